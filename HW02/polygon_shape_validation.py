@@ -5,9 +5,9 @@ where each point represents a coordinate on a 2D plane. To achieve this, the cod
 Input and Output examples
 Int class: This descriptor is responsible for validating that integer values assigned to attributes fall within specified bounds.
 It includes a min_value and max_value parameter to define the valid range for the attribute.
-Point2D class: This class represents a point on a 2D plane. It includes x and y attributes, which are instances of the
-Int descriptor class with specific bounds. The Point2D class ensures that the assigned values for x and y are
-non-negative integers within the defined range.
+Point2D class: This class represents a point on a 2D plane. It stores x and y in slots and checks them against
+instances of the Int descriptor class with specific bounds. The Point2D class ensures that the assigned values for x and y
+are non-negative integers within the defined range. FrozenPoint2D is an immutable, hashable variant.
 Point2DSequence class: This validator class ensures that the assigned value for the vertices attribute in the Polygon
 class is a sequence (mutable or immutable) and that each element in the sequence is an instance of the Point2D class.
 It includes min_length and max_length parameters to define the minimum and maximum number of vertices for a polygon.
@@ -19,25 +19,39 @@ list if the maximum length limit has not been reached.
 Overall, this application provides a way to define a polygon shape with validated vertices using the Polygon class and
 ensures that the assigned values meet the required criteria. """
 
+import array
+import struct
+import sys
+import time
+import tracemalloc
+from itertools import islice
+from operator import attrgetter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
 class Int:
     """
     Descriptor class to validate integer values within specified bounds.
     """
 
-    def __init__(self, min_value=None, max_value=None):
+    def __init__(self, min_value=None, max_value=None, name=None):
         self.min_value = min_value
         self.max_value = max_value
+        self.name = name
 
     def __set_name__(self, owner, name):
         self.name = name
 
-    def __set__(self, instance, value):
+    def validate(self, value):
         """
-        Set the value for the attribute after validation.
+        Check that a value is an integer within the bounds.
 
         Args:
-            instance: The instance of the class that owns the attribute.
-            value (int): The value to be set for the attribute.
+            value (int): The value to check.
 
         Raises:
             ValueError: If the value is not an integer or not within the specified bounds.
@@ -48,6 +62,19 @@ class Int:
             raise ValueError(f"Invalid value. Expected {self.name} >= {self.min_value}, but got {value}.")
         if self.max_value is not None and value > self.max_value:
             raise ValueError(f"Invalid value. Expected {self.name} <= {self.max_value}, but got {value}.")
+
+    def __set__(self, instance, value):
+        """
+        Set the value for the attribute after validation.
+
+        Args:
+            instance: The instance of the class that owns the attribute.
+            value (int): The value to be set for the attribute.
+
+        Raises:
+            ValueError: If the value is not an integer or not within the specified bounds.
+        """
+        self.validate(value)
         instance.__dict__[self.name] = value
 
     def __get__(self, instance, owner=None):
@@ -59,10 +86,13 @@ class Int:
 class Point2D:
     """
     Represents a point on a 2D plane with validated x and y coordinates.
+
+    The coordinates are stored in __slots__, so a point has no __dict__ and reading x or y is a plain slot access.
+    Every assignment is still checked against the Int validators in Point2D.bounds.
     """
 
-    x = Int(0, 800)
-    y = Int(0, 600)
+    __slots__ = ("x", "y")
+    bounds = {"x": Int(0, 800, name="x"), "y": Int(0, 600, name="y")}
 
     def __init__(self, x, y):
         """
@@ -71,12 +101,59 @@ class Point2D:
         Args:
             x (int): The x-coordinate.
             y (int): The y-coordinate.
+
+        Raises:
+            ValueError: If a coordinate is not an integer or not within its bounds.
         """
-        self.x = x
-        self.y = y
+        bounds = self.bounds
+        bounds["x"].validate(x)
+        bounds["y"].validate(y)
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "y", y)
+
+    def __setattr__(self, name, value):
+        bound = self.bounds.get(name)
+        if bound is not None:
+            bound.validate(value)
+        object.__setattr__(self, name, value)
+
+    def __reduce__(self):
+        return type(self), (self.x, self.y)
 
     def __repr__(self):
-        return f"Point2D(x={self.x}, y={self.y})"
+        return f"{type(self).__name__}(x={self.x}, y={self.y})"
+
+    @classmethod
+    def _unchecked(cls, x, y):
+        """
+        Create a point from coordinates that have already been validated, bypassing the bound checks.
+        """
+        point = cls.__new__(cls)
+        object.__setattr__(point, "x", x)
+        object.__setattr__(point, "y", y)
+        return point
+
+
+class FrozenPoint2D(Point2D):
+    """
+    Immutable Point2D that compares and hashes by its coordinates, so it can be deduplicated and used as a dict key.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    def __eq__(self, other):
+        if not isinstance(other, FrozenPoint2D):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
 
 
 from collections.abc import Sequence
@@ -163,20 +240,580 @@ class Polygon:
         if len(self.vertices) >= Polygon.vertices.max_length:
             raise ValueError("Cannot append more vertices. Polygon has reached maximum capacity.")
         self.vertices.append(point)
+        for observer in self.__dict__.get("_observers", ()):
+            observer(self)
+
+    def add_observer(self, observer):
+        """
+        Register a callable that is called with the polygon after append() changes its vertices.
+
+        Args:
+            observer (callable): The callable to register.
+        """
+        self.__dict__.setdefault("_observers", []).append(observer)
+
+    def remove_observer(self, observer):
+        """
+        Unregister a callable registered with add_observer().
+
+        Args:
+            observer (callable): The callable to unregister.
+        """
+        self.__dict__.get("_observers", []).remove(observer)
+
+    def area(self):
+        """
+        Return the area of the polygon, computed with the shoelace formula.
+        """
+        return float(PolygonBatch.from_polygons([self]).areas()[0])
+
+    def perimeter(self):
+        """
+        Return the length of the polygon's boundary.
+        """
+        return float(PolygonBatch.from_polygons([self]).perimeters()[0])
+
+    def centroid(self):
+        """
+        Return the (x, y) centroid of the polygon's area, or the mean of its vertices if the area is zero.
+        """
+        return tuple(PolygonBatch.from_polygons([self]).centroids()[0].tolist())
+
+    def bounding_box(self):
+        """
+        Return the (min_x, min_y, max_x, max_y) bounding box of the polygon.
+        """
+        return tuple(PolygonBatch.from_polygons([self]).bounding_boxes()[0].tolist())
+
+    def contains(self, x, y):
+        """
+        Test whether points lie inside the polygon, using the even-odd rule.
+
+        Args:
+            x (int or array): The x-coordinate of one point, or a NumPy array of x-coordinates.
+            y (int or array): The matching y-coordinate or coordinates.
+
+        Returns:
+            bool or numpy.ndarray: Whether each point lies inside.
+        """
+        vertices = self.vertices
+        if isinstance(x, (int, float)) and isinstance(y, (int, float)):
+            # A handful of edges against one point is faster in plain Python than through NumPy.
+            inside = False
+            for start, end in zip(vertices, vertices[1:] + vertices[:1]):
+                y1, y2 = start.y, end.y
+                if (y1 > y) != (y2 > y) and x < start.x + (y - y1) * (end.x - start.x) / (y2 - y1):
+                    inside = not inside
+            return inside
+        _require_numpy()
+        px, py = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        inside = np.zeros(np.broadcast(px, py).shape, dtype=bool)
+        for start, end in zip(vertices, vertices[1:] + vertices[:1]):
+            inside ^= _crosses(start.x, start.y, end.x, end.y, px, py)
+        return bool(inside) if inside.ndim == 0 else inside
+
+    def to_bytes(self):
+        """
+        Pack the polygon in the binary format of PolygonBatch.to_bytes().
+        """
+        return PolygonBatch.from_polygons([self]).to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Decode one polygon packed by to_bytes().
+
+        Raises:
+            ValueError: If the data is not exactly one valid packed polygon.
+        """
+        batch = PolygonBatch.from_bytes(data)
+        if len(batch) != 1:
+            raise ValueError(f"Invalid data. Expected one polygon, but got {len(batch)}.")
+        return batch[0]
+
+    @classmethod
+    def _unchecked(cls, vertices):
+        """
+        Create a Polygon from a list of vertices that has already been validated, bypassing the descriptor.
+        """
+        polygon = cls.__new__(cls)
+        polygon.__dict__["vertices"] = vertices
+        return polygon
+
+
+# Packed binary format: HEADER (magic, x and y typecodes, number of polygons, number of vertices), then the
+# little-endian int64 offsets, xs and ys columns of a PolygonBatch.
+MAGIC = b"PLG1"
+HEADER = struct.Struct("<4sccQQ")
+
+
+def _payload_size(header):
+    """
+    Return the number of bytes of the offsets, xs and ys columns that follow a packed header.
+    """
+    _, x_code, y_code, count, vertices = header
+    return (count + 1) * 8 + vertices * (array.array(x_code.decode()).itemsize + array.array(y_code.decode()).itemsize)
 
 
-p1 = Point2D(100, 200)
-p2 = Point2D(300, 400)
-p3 = Point2D(500, 600)
+def _little_endian(column):
+    if sys.byteorder == "big":
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    return column
 
-polygon = Polygon(p1, p2, p3)
 
-p4 = Point2D(700, 500)
-polygon.append(p4)  # This will work since the maximum length is not exceeded
-print(polygon)  # Output: Polygon([Point2D(x=100, y=200), Point2D(x=300, y=400), Point2D(x=500, y=600), Point2D(x=700, y=500)])
+def _require_numpy():
+    if np is None:
+        raise ImportError("Polygon geometry requires NumPy.")
 
-p5 = Point2D(200, 300)
-polygon.append(p5)  # This will raise ValueError since the maximum length has been reached
 
+def _crosses(x1, y1, x2, y2, px, py):
+    """
+    Return whether a ray cast from (px, py) towards +x crosses the edge (x1, y1)-(x2, y2). All arguments may be
+    NumPy arrays; horizontal edges never cross.
+    """
+    straddles = (y1 > py) != (y2 > py)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crossing_x = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+    return straddles & (px < crossing_x)
+
+
+def _coordinate_typecode(descriptor):
+    """
+    Return the smallest signed array typecode (int16, int32 or int64) that holds every value the Int descriptor
+    accepts.
+    """
+    low, high = descriptor.min_value, descriptor.max_value
+    if low is not None and high is not None:
+        if -2 ** 15 <= low and high < 2 ** 15:
+            return "h"
+        if -2 ** 31 <= low and high < 2 ** 31:
+            return "i"
+    return "q"
 
 
+class PolygonBatch:
+    """
+    Columnar store for many polygons.
+
+    The vertices of all polygons are kept in two contiguous coordinate arrays, xs and ys, typed with the smallest
+    integer type that fits the Point2D bounds (int16 for the default 800x600 plane). offsets holds, for each
+    polygon, the index of its first vertex, followed by the total number of vertices, so polygon i spans
+    xs[offsets[i]:offsets[i + 1]].
+
+    Coordinates and vertex counts are validated against the Point2D.bounds and Polygon.vertices bounds with
+    one range check per column over the whole batch, using NumPy when it is installed. Polygon and Point2D objects
+    are only built when a polygon is accessed; they are detached copies, so changing them does not change the batch.
+    """
+
+    _TYPECODES = {"x": _coordinate_typecode(Point2D.bounds["x"]), "y": _coordinate_typecode(Point2D.bounds["y"])}
+
+    def __init__(self, xs=(), ys=(), offsets=(0,)):
+        """
+        Initialize the batch from flat coordinate columns.
+
+        Args:
+            xs (sequence of int): The x-coordinates of all vertices, polygon after polygon.
+            ys (sequence of int): The y-coordinates of all vertices, polygon after polygon.
+            offsets (sequence of int): The index of the first vertex of each polygon, followed by the number of
+                vertices.
+
+        Raises:
+            ValueError: If a coordinate is not an integer or out of bounds, or the offsets do not describe polygons
+                with a valid number of vertices.
+        """
+        self.xs = self._column(xs, Point2D.bounds["x"])
+        self.ys = self._column(ys, Point2D.bounds["y"])
+        self.offsets = self._column(offsets, None)
+        self.validate()
+
+    @classmethod
+    def from_polygons(cls, polygons):
+        """
+        Create a batch holding the vertices of the given Polygon instances.
+        """
+        xs, ys, offsets = [], [], [0]
+        for polygon in polygons:
+            for point in polygon.vertices:
+                xs.append(point.x)
+                ys.append(point.y)
+            offsets.append(len(xs))
+        return cls(xs, ys, offsets)
+
+    @classmethod
+    def from_coordinates(cls, polygons):
+        """
+        Create a batch from polygons given as sequences of (x, y) pairs.
+        """
+        xs, ys, offsets = [], [], [0]
+        for vertices in polygons:
+            for x, y in vertices:
+                xs.append(x)
+                ys.append(y)
+            offsets.append(len(xs))
+        return cls(xs, ys, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """
+        Return polygon number index as a Polygon, or a new PolygonBatch for a slice.
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("PolygonBatch slices must be contiguous.")
+            stop = max(start, stop)
+            first, last = self.offsets[start], self.offsets[stop]
+            batch = PolygonBatch.__new__(PolygonBatch)
+            batch.xs, batch.ys = self.xs[first:last], self.ys[first:last]
+            batch.offsets = array.array("q", (offset - first for offset in self.offsets[start:stop + 1]))
+            return batch
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("PolygonBatch index out of range")
+        first, last = self.offsets[index], self.offsets[index + 1]
+        return Polygon._unchecked(list(map(Point2D._unchecked, self.xs[first:last], self.ys[first:last])))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return f"PolygonBatch({len(self)} polygons, {len(self.xs)} vertices)"
+
+    def append(self, vertices):
+        """
+        Append one polygon given as a Polygon or a sequence of Point2D instances or (x, y) pairs.
+
+        Raises:
+            ValueError: If a coordinate or the number of vertices is invalid.
+        """
+        if isinstance(vertices, Polygon):
+            vertices = vertices.vertices
+        coordinates = [(point.x, point.y) if isinstance(point, Point2D) else tuple(point) for point in vertices]
+        self.extend(PolygonBatch.from_coordinates([coordinates]))
+
+    def extend(self, batch):
+        """
+        Append every polygon of another PolygonBatch, or of an iterable of polygons accepted by append().
+        """
+        if not isinstance(batch, PolygonBatch):
+            batch = PolygonBatch.from_coordinates(
+                [(point.x, point.y) if isinstance(point, Point2D) else tuple(point)
+                 for point in (polygon.vertices if isinstance(polygon, Polygon) else polygon)]
+                for polygon in batch)
+        base = len(self.xs)
+        self.xs.extend(batch.xs)
+        self.ys.extend(batch.ys)
+        if np is not None:
+            self.offsets.frombytes((np.frombuffer(batch.offsets, dtype=np.int64)[1:] + base).tobytes())
+        else:
+            self.offsets.extend(offset + base for offset in batch.offsets[1:])
+
+    def to_bytes(self):
+        """
+        Pack the batch as a header followed by its offsets, xs and ys columns, byte for byte.
+        """
+        header = HEADER.pack(MAGIC, self.xs.typecode.encode(), self.ys.typecode.encode(), len(self), len(self.xs))
+        return header + b"".join(map(_little_endian, (self.offsets, self.xs, self.ys)))
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Decode a batch packed by to_bytes(). Each column is copied with one memcpy and range checked as a whole.
+
+        Raises:
+            ValueError: If the data is malformed or a coordinate or vertex count is invalid.
+        """
+        data = memoryview(data)
+        return cls._decode(HEADER.unpack_from(data), data[HEADER.size:])
+
+    @classmethod
+    def _decode(cls, header, payload):
+        magic, x_code, y_code, count, vertices = header
+        if magic != MAGIC:
+            raise ValueError(f"Invalid data. Expected the {MAGIC!r} header, but got {magic!r}.")
+        size = _payload_size(header)
+        if len(payload) != size:
+            raise ValueError(f"Invalid data. Expected {size} bytes of columns, but got {len(payload)}.")
+        columns = []
+        position = 0
+        for typecode, length in (("q", count + 1), (x_code.decode(), vertices), (y_code.decode(), vertices)):
+            column = array.array(typecode)
+            column.frombytes(payload[position:position + length * column.itemsize])
+            if sys.byteorder == "big":
+                column.byteswap()
+            columns.append(column)
+            position += length * column.itemsize
+        batch = cls.__new__(cls)
+        batch.offsets = columns[0]
+        batch.xs, batch.ys = (column if column.typecode == cls._TYPECODES[name] else cls._column(column, bounds)
+                              for column, (name, bounds) in zip(columns[1:], Point2D.bounds.items()))
+        batch.validate()
+        return batch
+
+    def vertex_counts(self):
+        """
+        Return the number of vertices of every polygon, as a NumPy array when NumPy is installed.
+        """
+        if np is not None:
+            return np.diff(np.frombuffer(self.offsets, dtype=np.int64))
+        return [last - first for first, last in zip(self.offsets, self.offsets[1:])]
+
+    def areas(self):
+        """
+        Return the area of every polygon as a NumPy array, computed with the shoelace formula over the whole batch.
+        """
+        x, y, starts, following = self._geometry_columns()
+        return np.abs(np.add.reduceat(x * y[following] - x[following] * y, starts)) / 2 if len(starts) else x[:0]
+
+    def perimeters(self):
+        """
+        Return the boundary length of every polygon as a NumPy array.
+        """
+        x, y, starts, following = self._geometry_columns()
+        return np.add.reduceat(np.hypot(x[following] - x, y[following] - y), starts) if len(starts) else x[:0]
+
+    def centroids(self):
+        """
+        Return the (x, y) area centroid of every polygon as an (n, 2) NumPy array. Polygons with zero area get the
+        mean of their vertices instead.
+        """
+        x, y, starts, following = self._geometry_columns()
+        if not len(starts):
+            return np.empty((0, 2))
+        cross = x * y[following] - x[following] * y
+        doubled_area = np.add.reduceat(cross, starts)
+        counts = np.diff(np.frombuffer(self.offsets, dtype=np.int64))
+        degenerate = doubled_area == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cx = np.add.reduceat((x + x[following]) * cross, starts) / (3 * doubled_area)
+            cy = np.add.reduceat((y + y[following]) * cross, starts) / (3 * doubled_area)
+        cx[degenerate] = (np.add.reduceat(x, starts) / counts)[degenerate]
+        cy[degenerate] = (np.add.reduceat(y, starts) / counts)[degenerate]
+        return np.column_stack((cx, cy))
+
+    def bounding_boxes(self):
+        """
+        Return the (min_x, min_y, max_x, max_y) bounding box of every polygon as an (n, 4) NumPy array.
+        """
+        _require_numpy()
+        xs, ys = np.frombuffer(self.xs, dtype=self.xs.typecode), np.frombuffer(self.ys, dtype=self.ys.typecode)
+        starts = np.frombuffer(self.offsets, dtype=np.int64)[:-1]
+        if not len(starts):
+            return np.empty((0, 4), dtype=xs.dtype)
+        return np.column_stack((np.minimum.reduceat(xs, starts), np.minimum.reduceat(ys, starts),
+                                np.maximum.reduceat(xs, starts), np.maximum.reduceat(ys, starts)))
+
+    def contains(self, x, y):
+        """
+        Test which polygons contain the point (x, y), using the even-odd rule.
+
+        Returns:
+            numpy.ndarray: A boolean array with one entry per polygon.
+        """
+        xs, ys, starts, following = self._geometry_columns()
+        if not len(starts):
+            return np.zeros(0, dtype=bool)
+        crossings = _crosses(xs, ys, xs[following], ys[following], float(x), float(y))
+        return np.add.reduceat(crossings.astype(np.int64), starts) % 2 == 1
+
+    def _geometry_columns(self):
+        """
+        Return the coordinates as float64 arrays, the index of each polygon's first vertex, and for every vertex the
+        index of the next vertex of the same polygon.
+        """
+        _require_numpy()
+        x = np.frombuffer(self.xs, dtype=self.xs.typecode).astype(np.float64)
+        y = np.frombuffer(self.ys, dtype=self.ys.typecode).astype(np.float64)
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        following = np.arange(1, len(x) + 1)
+        following[offsets[1:] - 1] = offsets[:-1]
+        return x, y, offsets[:-1], following
+
+    def validate(self):
+        """
+        Check every coordinate and vertex count of the batch with one range check per column.
+
+        Raises:
+            ValueError: If a coordinate is out of bounds or a polygon has an invalid number of vertices.
+        """
+        if len(self.xs) != len(self.ys):
+            raise ValueError(f"Invalid columns. Expected as many ys as xs, but got {len(self.ys)} and {len(self.xs)}.")
+        if not self.offsets or self.offsets[0] != 0 or self.offsets[-1] != len(self.xs):
+            raise ValueError(f"Invalid offsets. Expected 0 first and {len(self.xs)} last.")
+        self._check_range(self.xs, Point2D.bounds["x"], "vertex")
+        self._check_range(self.ys, Point2D.bounds["y"], "vertex")
+        counts = self.vertex_counts()
+        if np is not None:
+            counts = array.array("q", counts.tobytes())
+        self._check_range(counts, Polygon.vertices, "polygon")
+
+    @classmethod
+    def _column(cls, values, descriptor):
+        """
+        Copy values into an array of the descriptor's typecode, or of int64 offsets when descriptor is None.
+        """
+        typecode = "q" if descriptor is None else cls._TYPECODES[descriptor.name]
+        if isinstance(values, array.array) and values.typecode == typecode:
+            return array.array(typecode, values)
+        if np is not None and isinstance(values, np.ndarray):
+            if values.dtype.kind not in "biu":
+                raise ValueError(f"Invalid type. Expected integers, but got {values.dtype}.")
+            values = values.ravel()
+            if descriptor is not None:
+                # Check the bounds before the cast to the narrower typecode, which would wrap large values.
+                cls._check_range(values, descriptor, "vertex")
+            column = array.array(typecode)
+            column.frombytes(values.astype(np.dtype(typecode), copy=False).tobytes())
+            return column
+        try:
+            wide = array.array("q", values)
+        except (TypeError, OverflowError) as error:
+            bad = next((value for value in values if not isinstance(value, int)), None)
+            if bad is not None:
+                raise ValueError(f"Invalid type. Expected int, but got {type(bad)}.") from None
+            raise ValueError(f"Invalid value. {error}.") from None
+        if typecode == "q":
+            return wide
+        cls._check_range(wide, descriptor, "vertex")
+        if np is None:
+            return array.array(typecode, wide)
+        column = array.array(typecode)
+        column.frombytes(np.frombuffer(wide, dtype=np.int64).astype(np.dtype(typecode)).tobytes())
+        return column
+
+    @staticmethod
+    def _check_range(values, bounds, item):
+        """
+        Check that all values lie within the min/max bounds of an Int or Point2DSequence descriptor.
+        """
+        if not len(values):
+            return
+        if np is not None:
+            column = np.frombuffer(values, dtype=values.typecode) if isinstance(values, array.array) else values
+            low, high = column.min(), column.max()
+        else:
+            column = values
+            low, high = min(values), max(values)
+        if hasattr(bounds, "min_length"):
+            name, (min_value, max_value) = "the number of vertices", (bounds.min_length, bounds.max_length)
+        else:
+            name, (min_value, max_value) = bounds.name, (bounds.min_value, bounds.max_value)
+        if min_value is not None and low < min_value:
+            index = next(i for i, value in enumerate(column) if value < min_value)
+            raise ValueError(f"Invalid value. Expected {name} >= {min_value}, but got {low} at {item} {index}.")
+        if max_value is not None and high > max_value:
+            index = next(i for i, value in enumerate(column) if value > max_value)
+            raise ValueError(f"Invalid value. Expected {name} <= {max_value}, but got {high} at {item} {index}.")
+
+
+def dump_many(polygons, file, chunk_size=4096):
+    """
+    Write polygons to a binary file object as packed PolygonBatch blocks of at most chunk_size polygons.
+
+    Args:
+        polygons: A PolygonBatch, or an iterable of Polygon instances.
+        file: A binary file object.
+        chunk_size (int): Number of polygons per block.
+
+    Returns:
+        int: The number of polygons written.
+    """
+    if isinstance(polygons, PolygonBatch):
+        file.write(polygons.to_bytes())
+        return len(polygons)
+    written = 0
+    polygons = iter(polygons)
+    while chunk := list(islice(polygons, chunk_size)):
+        file.write(PolygonBatch.from_polygons(chunk).to_bytes())
+        written += len(chunk)
+    return written
+
+
+def iter_load(file):
+    """
+    Yield the polygons of a binary file object written by dump_many() or to_bytes(), decoding block by block.
+    """
+    while header := file.read(HEADER.size):
+        if len(header) < HEADER.size:
+            raise ValueError("Invalid data. The stream ends inside a header.")
+        header = HEADER.unpack(header)
+        yield from PolygonBatch._decode(header, memoryview(file.read(_payload_size(header))))
+
+
+def benchmark_points(count=10_000_000, sample=100_000):
+    """
+    Compare the slotted Point2D and FrozenPoint2D with the previous layout that kept x and y in a per-point __dict__
+    behind Int descriptors.
+
+    Prints the construction time, the time of an x read and the memory of one point, including its list slot.
+
+    Args:
+        count (int): Number of points created and read for the timings. The default of 10M needs about 2 GB of memory.
+        sample (int): Number of points traced for the memory figure.
+    """
+    class DictPoint2D:
+        x = Int(0, 800)
+        y = Int(0, 600)
+
+        def __init__(self, x, y):
+            self.x = x
+            self.y = y
+
+    xs = [i % 801 for i in range(count)]
+    ys = [i % 601 for i in range(count)]
+    for cls in (DictPoint2D, Point2D, FrozenPoint2D):
+        start = time.perf_counter()
+        points = list(map(cls, xs, ys))
+        create = time.perf_counter() - start
+        start = time.perf_counter()
+        sum(map(attrgetter("x"), points))
+        read = time.perf_counter() - start
+        del points
+        tracemalloc.start()
+        points = list(map(cls, xs[:sample], ys[:sample]))
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del points
+        print(f"{cls.__name__}: {create / count * 1e9:.0f} ns per point created, {read / count * 1e9:.0f} ns per x read, "
+              f"{size / sample:.0f} bytes per point")
+
+
+if __name__ == "__main__":
+    p1 = Point2D(100, 200)
+    p2 = Point2D(300, 400)
+    p3 = Point2D(500, 600)
+
+    polygon = Polygon(p1, p2, p3)
+
+    p4 = Point2D(700, 500)
+    polygon.append(p4)  # This will work since the maximum length is not exceeded
+    print(polygon)  # Output: Polygon([Point2D(x=100, y=200), Point2D(x=300, y=400), Point2D(x=500, y=600), Point2D(x=700, y=500)])
+
+    p5 = Point2D(200, 300)
+    batch = PolygonBatch.from_coordinates([[(100, 200), (300, 400), (500, 600)], [(0, 0), (800, 0), (800, 600), (0, 600)]])
+    print(batch)  # Output: PolygonBatch(2 polygons, 7 vertices)
+    print(batch[1])  # Output: Polygon([Point2D(x=0, y=0), Point2D(x=800, y=0), Point2D(x=800, y=600), Point2D(x=0, y=600)])
+    try:
+        PolygonBatch.from_coordinates([[(100, 200), (900, 400), (500, 600)]])
+    except ValueError as e:
+        print(e)  # Output: Invalid value. Expected x <= 800, but got 900 at vertex 1.
+
+    if np is not None:
+        print(batch.areas())  # Output: [     0. 480000.]
+        print(batch.contains(400, 300))  # Output: [False  True]
+        print(polygon.area(), polygon.bounding_box())  # Output: 60000.0 (100, 200, 700, 600)
+
+    vertices = {FrozenPoint2D(100, 200), FrozenPoint2D(100, 200), FrozenPoint2D(300, 400)}
+    print(len(vertices))  # Output: 2
+    benchmark_points()  # Prints the creation time, read time and memory per point of each layout
+
+    packed = polygon.to_bytes()
+    print(len(packed), Polygon.from_bytes(packed))  # Output: 54 Polygon([Point2D(x=100, y=200), ... Point2D(x=700, y=500)])
+    print(PolygonBatch.from_bytes(batch.to_bytes()))  # Output: PolygonBatch(2 polygons, 7 vertices)
+
+    polygon.append(p5)  # This will raise ValueError since the maximum length has been reached
@@ -0,0 +1,242 @@
+"""Spatial index over Polygon shapes for fast hit-testing and range queries.
+
+Point2D bounds every coordinate to the 800x600 plane, so a uniform grid of square cells covers the whole space with
+a fixed, small number of buckets. Each polygon is registered in every cell its bounding box overlaps; a point query
+only looks at the polygons of one cell, and a rectangle query at the polygons of the cells the rectangle overlaps.
+
+The index observes the polygons it holds, so a Polygon.append() that grows a shape moves it to its new cells.
+Polygons changed in any other way must be passed to GridIndex.update().
+"""
+
+import random
+import time
+
+from polygon_shape_validation import Point2D, Polygon
+
+
+class GridIndex:
+    """
+    Uniform grid index over the Point2D plane supporting point and rectangle queries.
+    """
+
+    def __init__(self, polygons=(), cell_size=50):
+        """
+        Initialize the index and bulk load the given polygons.
+
+        Args:
+            polygons (iterable): Polygon instances to index.
+            cell_size (int): Side length of the square grid cells.
+        """
+        self.cell_size = cell_size
+        self.columns = Point2D.bounds["x"].max_value // cell_size + 1
+        self.rows = Point2D.bounds["y"].max_value // cell_size + 1
+        self._cells = [[] for _ in range(self.columns * self.rows)]
+        self._entries = {}  # id(polygon) -> (polygon, bounding box, cell numbers)
+        self.bulk_load(polygons)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, polygon):
+        return id(polygon) in self._entries
+
+    def __iter__(self):
+        return (entry[0] for entry in self._entries.values())
+
+    def bulk_load(self, polygons):
+        """
+        Add many polygons at once. Polygons that are already indexed are skipped.
+
+        Args:
+            polygons (iterable): Polygon instances to index.
+        """
+        cells = self._cells
+        for polygon in polygons:
+            if id(polygon) in self._entries:
+                continue
+            box = self._bounding_box(polygon)
+            numbers = self._cell_numbers(box)
+            self._entries[id(polygon)] = (polygon, box, numbers)
+            for number in numbers:
+                cells[number].append(polygon)
+            polygon.add_observer(self.update)
+
+    def insert(self, polygon):
+        """
+        Add one polygon to the index.
+
+        Args:
+            polygon (Polygon): The polygon to index.
+        """
+        self.bulk_load((polygon,))
+
+    def remove(self, polygon):
+        """
+        Remove a polygon from the index.
+
+        Args:
+            polygon (Polygon): The polygon to remove.
+
+        Raises:
+            KeyError: If the polygon is not indexed.
+        """
+        _, _, numbers = self._entries.pop(id(polygon))
+        self._unlink(polygon, numbers)
+        polygon.remove_observer(self.update)
+
+    def update(self, polygon):
+        """
+        Move a polygon whose vertices have changed to the cells of its new bounding box.
+
+        Args:
+            polygon (Polygon): An indexed polygon.
+        """
+        _, _, old_numbers = self._entries[id(polygon)]
+        box = self._bounding_box(polygon)
+        numbers = self._cell_numbers(box)
+        self._entries[id(polygon)] = (polygon, box, numbers)
+        if numbers != old_numbers:
+            self._unlink(polygon, old_numbers)
+            for number in numbers:
+                self._cells[number].append(polygon)
+
+    def query_point(self, x, y):
+        """
+        Return the polygons containing the point (x, y).
+
+        Args:
+            x (int or float): The x-coordinate of the point.
+            y (int or float): The y-coordinate of the point.
+
+        Returns:
+            list: The polygons that contain the point, by the even-odd rule.
+        """
+        if not (0 <= x <= Point2D.bounds["x"].max_value and 0 <= y <= Point2D.bounds["y"].max_value):
+            return []
+        entries = self._entries
+        hits = []
+        for polygon in self._cells[self._cell_number(x, y)]:
+            min_x, min_y, max_x, max_y = entries[id(polygon)][1]
+            if min_x <= x <= max_x and min_y <= y <= max_y and polygon.contains(x, y):
+                hits.append(polygon)
+        return hits
+
+    def query_rect(self, min_x, min_y, max_x, max_y):
+        """
+        Return the polygons whose bounding boxes intersect the rectangle.
+
+        Args:
+            min_x, min_y, max_x, max_y (int or float): The corners of the rectangle.
+
+        Returns:
+            list: The matching polygons, each listed once.
+        """
+        entries = self._entries
+        seen = set()
+        hits = []
+        for number in self._cell_numbers((min_x, min_y, max_x, max_y)):
+            for polygon in self._cells[number]:
+                if id(polygon) in seen:
+                    continue
+                seen.add(id(polygon))
+                box = entries[id(polygon)][1]
+                if box[0] <= max_x and min_x <= box[2] and box[1] <= max_y and min_y <= box[3]:
+                    hits.append(polygon)
+        return hits
+
+    def _unlink(self, polygon, numbers):
+        for number in numbers:
+            cell = self._cells[number]
+            cell[:] = [other for other in cell if other is not polygon]
+
+    def _cell_number(self, x, y):
+        column = min(max(int(x // self.cell_size), 0), self.columns - 1)
+        row = min(max(int(y // self.cell_size), 0), self.rows - 1)
+        return row * self.columns + column
+
+    def _cell_numbers(self, box):
+        """
+        Return the numbers of all cells overlapped by a (min_x, min_y, max_x, max_y) box, as a tuple.
+        """
+        first = self._cell_number(box[0], box[1])
+        last = self._cell_number(box[2], box[3])
+        first_row, first_column = divmod(first, self.columns)
+        last_row, last_column = divmod(last, self.columns)
+        return tuple(row * self.columns + column
+                     for row in range(first_row, last_row + 1)
+                     for column in range(first_column, last_column + 1))
+
+    @staticmethod
+    def _bounding_box(polygon):
+        xs = [point.x for point in polygon.vertices]
+        ys = [point.y for point in polygon.vertices]
+        return min(xs), min(ys), max(xs), max(ys)
+
+
+def random_polygon(rng, max_size=40):
+    """
+    Return a random small triangle or quadrilateral inside the Point2D plane.
+    """
+    x = rng.randint(0, Point2D.bounds["x"].max_value - max_size)
+    y = rng.randint(0, Point2D.bounds["y"].max_value - max_size)
+    corners = [(0, 0), (max_size, 0), (max_size, max_size), (0, max_size)][:rng.randint(3, 4)]
+    return Polygon(*(Point2D(x + rng.randint(0, dx), y + rng.randint(0, dy)) for dx, dy in corners))
+
+
+def benchmark(count=20_000, queries=50, seed=0):
+    """
+    Compare point and rectangle queries through a GridIndex against a linear scan over the same polygons.
+
+    Args:
+        count (int): Number of random polygons.
+        queries (int): Number of point and of rectangle queries.
+        seed (int): Seed of the random polygons and queries.
+    """
+    rng = random.Random(seed)
+    polygons = [random_polygon(rng) for _ in range(count)]
+    points = [(rng.uniform(0, 800), rng.uniform(0, 600)) for _ in range(queries)]
+    rects = [(x, y, x + 50, y + 50) for x, y in points]
+
+    start = time.perf_counter()
+    index = GridIndex(polygons)
+    print(f"bulk load of {count} polygons: {time.perf_counter() - start:.3f} s")
+
+    def linear_point(x, y):
+        return [polygon for polygon in polygons if polygon.contains(x, y)]
+
+    def linear_rect(min_x, min_y, max_x, max_y):
+        hits = []
+        for polygon in polygons:
+            box = GridIndex._bounding_box(polygon)
+            if box[0] <= max_x and min_x <= box[2] and box[1] <= max_y and min_y <= box[3]:
+                hits.append(polygon)
+        return hits
+
+    for name, indexed, linear, arguments in (("query_point", index.query_point, linear_point, points),
+                                             ("query_rect", index.query_rect, linear_rect, rects)):
+        start = time.perf_counter()
+        indexed_hits = [indexed(*query) for query in arguments]
+        indexed_time = time.perf_counter() - start
+        start = time.perf_counter()
+        linear_hits = [linear(*query) for query in arguments]
+        linear_time = time.perf_counter() - start
+        assert [set(map(id, hits)) for hits in indexed_hits] == [set(map(id, hits)) for hits in linear_hits]
+        print(f"{name}: {indexed_time / queries * 1e6:.0f} us indexed, {linear_time / queries * 1e6:.0f} us linear "
+              f"({linear_time / indexed_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    triangle = Polygon(Point2D(100, 100), Point2D(300, 100), Point2D(100, 300))
+    square = Polygon(Point2D(500, 400), Point2D(600, 400), Point2D(600, 500))
+    index = GridIndex([triangle, square])
+    print(index.query_point(150, 150) == [triangle])  # Output: True
+    print(index.query_point(590, 590))  # Output: []
+
+    square.append(Point2D(500, 590))  # The index moves the polygon to the cells of its new bounding box
+    print(index.query_point(510, 580) == [square])  # Output: True
+    print(len(index.query_rect(0, 0, 800, 600)))  # Output: 2
+
+    index.remove(triangle)
+    print(index.query_point(150, 150))  # Output: []
+
+    benchmark()  # Prints the time per query of the index and of a linear scan
@@ -11,9 +11,46 @@ integers, floats, lists, and tuples. The Person class utilizes these descriptor
 with the corresponding type. By using these descriptors, any attempt to assign an incorrect type to these attributes
 will raise a ValueError with an appropriate error message indicating the expected type."""
 
+import array
+import os
+import random
+import timeit
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Process-wide switch for the descriptors of this module. Setting STRIP_TYPE_CHECKS=1 in the environment, or calling
+# set_type_checks(False), makes descriptors in classes created afterwards remove themselves, leaving plain attributes.
+# The switch of TypeCheckingMeta in HW01 reads the same variable but is set independently.
+_type_checks = os.environ.get("STRIP_TYPE_CHECKS", "").lower() not in ("1", "true", "yes")
+
+
+def set_type_checks(enabled):
+    """
+    Enable or disable type validation for classes created from now on. Existing classes keep their mode.
+
+    Parameters:
+        enabled (bool): Whether new classes validate attribute assignments.
+    """
+    global _type_checks
+    _type_checks = bool(enabled)
+
+
+def type_checks_enabled():
+    """
+    Return whether classes created now validate attribute assignments.
+    """
+    return _type_checks
+
+
 class ValidType:
     """
     Descriptor class for enforcing type validation on attributes.
+
+    When type checks are disabled at class creation, the descriptor removes itself from the owner class and the
+    attribute becomes a plain instance attribute without validation.
     """
 
     def __init__(self, data_type):
@@ -25,16 +62,26 @@ class ValidType:
         """
         self.data_type = data_type
         self.name = None
+        self.enabled = True
 
     def __set_name__(self, owner, name):
         """
-        Set the name of the attribute when accessed in the owner class.
+        Set the name of the attribute when accessed in the owner class, and register the descriptor in the
+        owner's __validated_fields__ so whole columns can be validated with from_columns().
 
         Parameters:
             owner (type): The owner class of the attribute.
             name (str): The name of the attribute.
         """
         self.name = name
+        self.enabled = _type_checks
+        fields = owner.__dict__.get("__validated_fields__")
+        if fields is None:
+            fields = {}
+            setattr(owner, "__validated_fields__", fields)
+        fields[name] = self
+        if not _type_checks:
+            delattr(owner, name)
 
     def __set__(self, instance, value):
         """
@@ -66,6 +113,63 @@ class ValidType:
             return self
         return instance.__dict__[self.name]
 
+    def is_valid(self, value):
+        """
+        Check a value without raising.
+
+        Parameters:
+            value: The value to check.
+
+        Returns:
+            bool: Whether the value may be assigned to the attribute.
+        """
+        return isinstance(value, self.data_type)
+
+    def error(self, value):
+        """
+        Describe why a value may not be assigned to the attribute.
+
+        Parameters:
+            value: A value for which is_valid() returned False.
+
+        Returns:
+            str: The message __set__ raises for the value.
+        """
+        return f"Invalid type. Expected {self.data_type}, but got {type(value)}."
+
+    def validate_column(self, values):
+        """
+        Validate a whole column of values for the attribute.
+
+        A NumPy array is accepted or rejected as a whole by its dtype and converted to Python values in one
+        call. Other sequences are checked with a single C-level pass over the column, and only a column that
+        fails is walked again to report the offending rows.
+
+        Parameters:
+            values (sequence): The column to validate.
+
+        Returns:
+            tuple: The column as a list, and a list of (row, message) errors where row is None for an error
+            that applies to the whole column.
+        """
+        if np is not None and isinstance(values, np.ndarray):
+            kinds = _NUMPY_KINDS.get(self.data_type)
+            if not self.enabled or (kinds is not None and values.dtype.kind in kinds):
+                return values.tolist(), []
+            if values.dtype.kind != "O":
+                return [], [(None, f"Invalid dtype. Expected {self.data_type}, but got {values.dtype}.")]
+        values = list(values)
+        if not self.enabled:
+            return values, []
+        check = self.data_type.__instancecheck__ if type(self).is_valid is ValidType.is_valid else self.is_valid
+        if all(map(check, values)):
+            return values, []
+        return values, [(row, self.error(value)) for row, value in enumerate(values) if not check(value)]
+
+
+# NumPy dtype kinds whose elements convert to instances of each Python type with ndarray.tolist().
+_NUMPY_KINDS = {int: "biu", float: "f", str: "U", bool: "b", bytes: "S"}
+
 
 class Int(ValidType):
     """
@@ -91,75 +195,338 @@ class Float(ValidType):
         super().__init__(float)
 
 
-class List(ValidType):
+class ValidSequence(ValidType):
     """
-    Descriptor class for list attributes with specified element type.
+    Base descriptor for list and tuple attributes with a specified element type.
+
+    The elements are checked according to the check mode:
+        "full": every element is checked on every assignment.
+        "sample": only sample_size randomly chosen elements, plus the first and the last, are checked.
+        "trust": every element is checked the first time a container is assigned; assigning the container the
+            instance already holds again, with the same length, does not walk it again. The instance remembers
+            the id and length of the container it validated last in its __dict__, so nothing outlives it.
     """
 
-    def __init__(self, data_type):
+    def __init__(self, container_type, data_type, check="full", sample_size=64):
         """
-        Initialize the List descriptor.
+        Initialize the sequence descriptor.
 
         Parameters:
-            data_type (type): The expected data type for the elements in the list.
+            container_type (type): The expected type of the container.
+            data_type (type): The expected data type for the elements in the container.
+            check (str): The element check mode, "full", "sample" or "trust".
+            sample_size (int): Number of random elements checked in "sample" mode.
         """
-        super().__init__(list)
+        if check not in ("full", "sample", "trust"):
+            raise ValueError(f"Invalid check mode. Expected 'full', 'sample' or 'trust', but got {check!r}.")
+        super().__init__(container_type)
         self._type = data_type
+        self._item_check = data_type.__instancecheck__
+        self._fully_checked_type = container_type if check == "full" else None
+        self.wrap = False
+        self.check = check
+        self.sample_size = sample_size
+        self._trust_key = None
+
+    def __set_name__(self, owner, name):
+        super().__set_name__(owner, name)
+        self._trust_key = f"_{name}_trusted"
 
     def __set__(self, instance, value):
         """
-        Set the list attribute value with type validation for elements.
+        Set the attribute value with type validation for the container and its elements.
 
         Parameters:
             instance (object): The instance of the owner class.
-            value (list): The list value to be assigned to the attribute.
+            value: The container to be assigned to the attribute.
 
         Raises:
-            ValueError: If the provided value is not a list or contains elements of incorrect data type.
+            ValueError: If the provided value is not of the container type or contains elements of incorrect data type.
         """
-        if not isinstance(value, list):
-            raise ValueError(f"Invalid type. Expected list, but got {type(value)}.")
-        for item in value:
-            if not isinstance(item, self._type):
-                raise ValueError(f"Invalid type. Expected {self._type}, but got {type(item)}.")
+        if type(value) is self._fully_checked_type:
+            # A Python loop beats all(map(...)) on short containers, where its setup cost dominates.
+            if len(value) <= 32:
+                item_type = self._type
+                for item in value:
+                    if not isinstance(item, item_type):
+                        raise ValueError(f"Invalid type. Expected {item_type}, but got {type(item)}.")
+            elif not all(map(self._item_check, value)):
+                raise ValueError(self.error(value))
+        elif self.check == "trust" and isinstance(value, self.data_type):
+            # The id is only meaningful while the instance holds the container, which keeps it alive.
+            if instance.__dict__.get(self._trust_key) != (id(value), len(value)):
+                if not self.is_valid(value):
+                    raise ValueError(self.error(value))
+                instance.__dict__[self._trust_key] = (id(value), len(value))
+        elif not self.is_valid(value):
+            raise ValueError(self.error(value))
+        if self.wrap and type(value) is list:
+            value = ValidatedList(self._type, value, validated=True)
+            instance.__dict__.pop(self._trust_key, None)
         instance.__dict__[self.name] = value
 
+    def is_valid(self, value):
+        if not isinstance(value, self.data_type):
+            return False
+        if self.check == "sample" and len(value) > self.sample_size + 2:
+            sample = [value[0], value[-1]] + [value[i] for i in random.sample(range(len(value)), self.sample_size)]
+            return all(map(self._item_check, sample))
+        return all(map(self._item_check, value))
+
+    def error(self, value):
+        if not isinstance(value, self.data_type):
+            return f"Invalid type. Expected {self.data_type.__name__}, but got {type(value)}."
+        item = next(item for item in value if not isinstance(item, self._type))
+        return f"Invalid type. Expected {self._type}, but got {type(item)}."
+
+
+class List(ValidSequence):
+    """
+    Descriptor class for list attributes with specified element type.
+
+    Besides lists, it accepts without walking them:
+        ValidatedList instances whose element type is the descriptor's element type or a subclass of it;
+        array.array and one-dimensional NumPy arrays whose typecode or dtype holds the element type.
+    With wrap=True, plain lists are copied into a ValidatedList on assignment, so later mutations through the
+    attribute check only the elements they add or replace.
+    """
+
+    def __init__(self, data_type, check="full", sample_size=64, wrap=False):
+        """
+        Initialize the List descriptor.
+
+        Parameters:
+            data_type (type): The expected data type for the elements in the list.
+            check (str): The element check mode, "full", "sample" or "trust".
+            sample_size (int): Number of random elements checked in "sample" mode.
+            wrap (bool): Store assigned lists as ValidatedList copies.
+        """
+        super().__init__(list, data_type, check, sample_size)
+        self.wrap = wrap
+
+    def is_valid(self, value):
+        if isinstance(value, array.array):
+            return value.typecode in _ARRAY_TYPECODES.get(self._type, "")
+        if np is not None and isinstance(value, np.ndarray):
+            return value.ndim == 1 and value.dtype.kind in _NUMPY_KINDS.get(self._type, "")
+        if type(value) is ValidatedList and issubclass(value.item_type, self._type):
+            return True
+        return super().is_valid(value)
+
+    def error(self, value):
+        if isinstance(value, array.array):
+            return f"Invalid typecode. Expected an array of {self._type}, but got typecode {value.typecode!r}."
+        if np is not None and isinstance(value, np.ndarray):
+            return f"Invalid dtype. Expected a 1-D array of {self._type}, but got {value.ndim}-D {value.dtype}."
+        return super().error(value)
+
+
+# array.array typecodes whose elements are instances of each Python type.
+_ARRAY_TYPECODES = {int: "bBhHiIlLqQ", float: "fd", str: "u"}
+
 
-class Tuple(ValidType):
+class Tuple(ValidSequence):
     """
     Descriptor class for tuple attributes with specified element type.
     """
 
-    def __init__(self, data_type):
+    def __init__(self, data_type, check="full", sample_size=64):
         """
         Initialize the Tuple descriptor.
 
         Parameters:
             data_type (type): The expected data type for the elements in the tuple.
+            check (str): The element check mode, "full", "sample" or "trust".
+            sample_size (int): Number of random elements checked in "sample" mode.
         """
-        super().__init__(tuple)
-        self._type = data_type
+        super().__init__(tuple, data_type, check, sample_size)
 
-    def __set__(self, instance, value):
+
+class ValidatedList(list):
+    """
+    List that keeps every element an instance of item_type, checking only the elements that each mutation adds
+    or replaces.
+    """
+
+    __slots__ = ("item_type",)
+
+    def __init__(self, item_type, iterable=(), validated=False):
         """
-        Set the tuple attribute value with type validation for elements.
+        Initialize the list.
 
         Parameters:
-            instance (object): The instance of the owner class.
-            value (tuple): The tuple value to be assigned to the attribute.
+            item_type (type): The required type of the elements.
+            iterable (iterable): The initial elements.
+            validated (bool): The caller has already checked the initial elements.
 
         Raises:
-            ValueError: If the provided value is not a tuple or contains elements of incorrect data type.
+            ValueError: If an initial element is not an instance of item_type.
         """
-        if not isinstance(value, tuple):
-            raise ValueError(f"Invalid type. Expected tuple, but got {type(value)}.")
-        for item in value:
-            if not isinstance(item, self._type):
-                raise ValueError(f"Invalid type. Expected {self._type}, but got {type(item)}.")
-        instance.__dict__[self.name] = value
+        self.item_type = item_type
+        if not validated and not (type(iterable) is ValidatedList and issubclass(iterable.item_type, item_type)):
+            iterable = self._checked(iterable)
+        super().__init__(iterable)
+
+    def append(self, item):
+        if not isinstance(item, self.item_type):
+            raise ValueError(f"Invalid type. Expected {self.item_type}, but got {type(item)}.")
+        super().append(item)
+
+    def insert(self, index, item):
+        if not isinstance(item, self.item_type):
+            raise ValueError(f"Invalid type. Expected {self.item_type}, but got {type(item)}.")
+        super().insert(index, item)
+
+    def extend(self, items):
+        super().extend(self._checked(items))
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = self._checked(value)
+        elif not isinstance(value, self.item_type):
+            raise ValueError(f"Invalid type. Expected {self.item_type}, but got {type(value)}.")
+        super().__setitem__(index, value)
+
+    def copy(self):
+        return ValidatedList(self.item_type, self, validated=True)
+
+    def __repr__(self):
+        return f"ValidatedList({self.item_type.__name__}, {super().__repr__()})"
+
+    def _checked(self, items):
+        if type(items) is ValidatedList and issubclass(items.item_type, self.item_type):
+            return items
+        if not isinstance(items, (list, tuple)):
+            items = list(items)
+        if not all(map(self.item_type.__instancecheck__, items)):
+            item = next(item for item in items if not isinstance(item, self.item_type))
+            raise ValueError(f"Invalid type. Expected {self.item_type}, but got {type(item)}.")
+        return items
+
+
+class ColumnValidationError(ValueError):
+    """
+    Raised by from_columns() with every error found in the columns.
+    """
+
+    def __init__(self, errors):
+        """
+        Initialize the error.
+
+        Parameters:
+            errors (list): (field, row, message) tuples; row is None for errors about a whole column.
+        """
+        self.errors = errors
+        shown = "; ".join(f"{field}[{row}]: {message}" if row is not None else f"{field}: {message}"
+                          for field, row, message in errors[:5])
+        more = f" (and {len(errors) - 5} more)" if len(errors) > 5 else ""
+        super().__init__(f"{len(errors)} invalid values: {shown}{more}")
+
+
+class ColumnView:
+    """
+    Validated columns of a record class. Rows are materialized as instances only when accessed.
+    """
 
+    def __init__(self, record_class, columns):
+        """
+        Initialize the view.
+
+        Parameters:
+            record_class (type): The class rows are materialized as.
+            columns (dict): Validated columns of equal length, keyed by attribute name.
+        """
+        self.record_class = record_class
+        self.columns = columns
+        self._length = len(next(iter(columns.values()), ()))
+
+    def __len__(self):
+        return self._length
+
+    def __getattr__(self, name):
+        """
+        Return the column of the named attribute.
+        """
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
 
-class Person:
+    def __getitem__(self, index):
+        """
+        Return the row at the index as an instance, or a list of instances for a slice.
+        """
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        instance = object.__new__(self.record_class)
+        instance.__dict__.update((name, column[index]) for name, column in self.columns.items())
+        return instance
+
+    def __iter__(self):
+        names = list(self.columns)
+        new = object.__new__
+        for row in zip(*self.columns.values()):
+            instance = new(self.record_class)
+            instance.__dict__.update(zip(names, row))
+            yield instance
+
+
+class ValidatedRecord:
+    """
+    Base class for classes whose attributes are ValidType descriptors, adding bulk construction from columns.
+    """
+
+    @classmethod
+    def from_columns(cls, columns=None, view=False, **named_columns):
+        """
+        Build many instances from one column per attribute, validating each column as a whole.
+
+        Every column is validated before any error is raised, so the error lists all invalid values at once.
+        The instances are created without going through __init__ or the descriptors again.
+
+        Parameters:
+            columns (dict, optional): Columns keyed by attribute name.
+            view (bool): Return a ColumnView that builds instances on access instead of a list of instances.
+            **named_columns: Columns passed as keyword arguments.
+
+        Returns:
+            list or ColumnView: The instances, or a view over the validated columns.
+
+        Raises:
+            ColumnValidationError: If a column is missing, unknown, of the wrong length, or holds invalid values.
+        """
+        columns = {**(columns or {}), **named_columns}
+        fields = {}
+        for klass in reversed(cls.__mro__):
+            fields.update(klass.__dict__.get("__validated_fields__", {}))
+
+        errors = [(name, None, "Unknown attribute.") for name in columns if name not in fields]
+        errors += [(name, None, "Missing column.") for name in fields if name not in columns]
+        validated = {}
+        lengths = set()
+        for name, descriptor in fields.items():
+            if name in columns:
+                values, column_errors = descriptor.validate_column(columns[name])
+                validated[name] = values
+                errors += [(name, row, message) for row, message in column_errors]
+                if all(row is not None for row, _ in column_errors):
+                    lengths.add(len(values))
+        if len(lengths) > 1:
+            errors.append((None, None, f"Columns have different lengths: {sorted(lengths)}."))
+        if errors:
+            raise ColumnValidationError(errors)
+
+        columns_view = ColumnView(cls, validated)
+        if view:
+            return columns_view
+        return list(columns_view)
+
+
+class Person(ValidatedRecord):
     """
     Class representing a person with type-validated attributes.
     """
@@ -187,24 +554,74 @@ class Person:
         self.favourite_foods = favourite_foods
         self.name = name
 
-# Test the Person class
-try:
-    person = Person(25, 175.5, ["reading", "swimming"], ("pizza", "pasta"), "Ann")
-
-    print(person.age)               # Output: 25
-    print(person.height)            # Output: 175.5
-    print(person.tags)              # Output: ['reading', 'swimming', 'running']
-    print(person.favourite_foods)   # Output: ('pizza', 'pasta')
-    print(person.name)              # Output: Ann
-
-    # Attempt to assign incorrect types
-    person.age = "25"               # Raises ValueError: Invalid type. Expected <class 'int'>, but got <class 'str'>.
-    person.height = "175.5"         # Raises ValueError: Invalid type. Expected <class 'float'>, but got <class 'str'>.
-    person.tags = [1, 2]            # Raises ValueError: Invalid type. Expected <class 'str'>, but got <class 'int'>.
-    person.favourite_foods = ["pizza", "pasta"]  # Raises ValueError: Invalid type. Expected <class 'tuple'>, but got <class 'list'>.
-    person.name = 25               # Raises ValueError: Invalid type. Expected <class 'str'>, but got <class 'int'>.
-except ValueError as e:
-    print(str(e))
-
-
+def benchmark_attribute_writes(number=200_000):
+    """
+    Time attribute writes through the descriptors against a class created with type checks disabled,
+    and print the cost per write of both.
 
+    Parameters:
+        number (int): Number of writes per measurement.
+    """
+    enabled = type_checks_enabled()
+    try:
+        for mode in (True, False):
+            set_type_checks(mode)
+
+            class Record:
+                age = Int()
+                tags = List(str)
+
+            record = Record()
+            for statement in ("record.age = 25", "record.tags = tags"):
+                seconds = min(timeit.repeat(statement, globals={"record": record, "tags": ["a", "b", "c"]},
+                                            number=number, repeat=5))
+                label = "validated" if mode else "stripped"
+                print(f"{label} {statement}: {seconds / number * 1e9:.0f} ns per write")
+    finally:
+        set_type_checks(enabled)
+
+
+if __name__ == "__main__":
+    # Test the Person class
+    benchmark_attribute_writes()  # Prints the time per write with and without validation
+
+    people = Person.from_columns(age=[25, 31], height=[175.5, 162.0], tags=[["reading"], []],
+                                 favourite_foods=[("pizza",), ("sushi", "ramen")], name=["Ann", "Bob"])
+    print(people[1].name, people[1].favourite_foods)  # Output: Bob ('sushi', 'ramen')
+    try:
+        Person.from_columns(age=[25, "31"], height=[175.5, 162], tags=[[], []], favourite_foods=[(), ()],
+                            name=["Ann", "Bob"])
+    except ValueError as e:
+        print(str(e))  # Output: 2 invalid values: age[1]: Invalid type. ...; height[1]: Invalid type. ...
+
+
+    class Playlist:
+        track_ids = List(int, wrap=True)
+
+
+    playlist = Playlist()
+    playlist.track_ids = [1, 2]
+    playlist.track_ids.append(3)  # Checks only the appended element
+    print(playlist.track_ids)  # Output: ValidatedList(int, [1, 2, 3])
+    try:
+        playlist.track_ids.append("4")
+    except ValueError as e:
+        print(str(e))  # Output: Invalid type. Expected <class 'int'>, but got <class 'str'>.
+
+    try:
+        person = Person(25, 175.5, ["reading", "swimming"], ("pizza", "pasta"), "Ann")
+
+        print(person.age)               # Output: 25
+        print(person.height)            # Output: 175.5
+        print(person.tags)              # Output: ['reading', 'swimming', 'running']
+        print(person.favourite_foods)   # Output: ('pizza', 'pasta')
+        print(person.name)              # Output: Ann
+
+        # Attempt to assign incorrect types
+        person.age = "25"               # Raises ValueError: Invalid type. Expected <class 'int'>, but got <class 'str'>.
+        person.height = "175.5"         # Raises ValueError: Invalid type. Expected <class 'float'>, but got <class 'str'>.
+        person.tags = [1, 2]            # Raises ValueError: Invalid type. Expected <class 'str'>, but got <class 'int'>.
+        person.favourite_foods = ["pizza", "pasta"]  # Raises ValueError: Invalid type. Expected <class 'tuple'>, but got <class 'list'>.
+        person.name = 25               # Raises ValueError: Invalid type. Expected <class 'str'>, but got <class 'int'>.
+    except ValueError as e:
+        print(str(e))
@@ -99,53 +99,290 @@ class Point3D:
 
 
 # DRY Version - Using Metaclasses
+import re
+import struct
+import sys
+from array import array
+from itertools import chain, groupby, islice
+from operator import attrgetter
+
+_point_classes = {}  # (dim, dtype) -> point class
+
+
 class SlottedStruct(type):
     """Metaclass to dynamically create classes for N-dimensional points."""
 
+    AXES = 'xyzw'
+    MAX_SLOTS = 16  # Points with more coordinates store them in one array instead of one slot each
+    TYPECODES = {float: 'd', int: 'q'}
+
     def __new__(cls, name, bases, namespace):
-        """Create a new class dynamically based on its name and dimension."""
-        if name != 'Point':
-            dim = int(name.split('D')[0][-1])  # Extract dimension from the class name
-            namespace['__slots__'] = tuple(f'_{i}' for i in range(1, dim + 1))
-            namespace['__init__'] = cls._init_coordinates
-            namespace['__eq__'] = cls._eq_coordinates
-            namespace['__hash__'] = cls._hash_coordinates
-            namespace['__repr__'] = cls._repr_coordinates
-            namespace['__str__'] = cls._str_coordinates
+        """
+        Create a new class dynamically based on its dimension, given as `dim` or in a PointND class name.
+
+        A subclass of a point class that keeps its dim and dtype, e.g. `class MyPoint(Point2D)`, reuses the layout
+        and methods of its base and adds no slots.
+        """
+        if any(isinstance(base, SlottedStruct) for base in bases):
+            parent = next((base for base in bases if getattr(base, 'dim', None) is not None), None)
+            if (parent is not None and namespace.get('dim', parent.dim) == parent.dim
+                    and namespace.get('dtype', parent.dtype) is parent.dtype):
+                namespace.setdefault('__slots__', ())
+                return super().__new__(cls, name, bases, namespace)
+            dim = namespace.get('dim')
+            if dim is None:
+                match = re.fullmatch(r'Point(\d+)D', name)
+                if match is None:
+                    raise TypeError(f'Cannot derive the dimension of {name}; name it PointND or set dim.')
+                dim = int(match.group(1))
+            if not isinstance(dim, int) or dim < 1:
+                raise ValueError(f'Invalid dimension. Expected a positive integer, but got {dim!r}.')
+            dtype = namespace.get('dtype')
+            root = [base for base in bases[0].__mro__ if isinstance(base, SlottedStruct)][-1]
+            namespace['dim'] = dim
+            namespace['dtype'] = dtype
+            if dim <= cls.MAX_SLOTS:
+                cls._add_slotted_layout(name, namespace, dim, dtype, root)
+            else:
+                cls._add_array_layout(namespace, dim, dtype)
+            new_class = super().__new__(cls, name, bases, namespace)
+            _point_classes.setdefault((dim, dtype), new_class)
+            return new_class
 
         return super().__new__(cls, name, bases, namespace)
 
-    def _init_coordinates(self, *args):
+    @classmethod
+    def _axes(cls, dim):
+        """Name the coordinates x, y, z, w, or x1 ... xN for more than four dimensions."""
+        return tuple(cls.AXES[:dim]) if dim <= len(cls.AXES) else tuple(f'x{i}' for i in range(1, dim + 1))
+
+    @classmethod
+    def _add_slotted_layout(cls, name, namespace, dim, dtype, root):
+        """Store each coordinate in its own slot, behind generated methods."""
+        namespace['__slots__'] = tuple(f'_{i}' for i in range(1, dim + 1))
+        for i, axis in enumerate(cls._axes(dim), start=1):
+            namespace[axis] = property(attrgetter(f'_{i}'), doc=f'Get the {axis}-coordinate of the point.')
+        for method in cls._compile_methods(dim, dtype, root):
+            method.__qualname__ = f'{name}.{method.__name__}'
+            namespace[method.__name__] = method
+
+    @classmethod
+    def _add_array_layout(cls, namespace, dim, dtype):
+        """Store all coordinates in a single array.array slot."""
+        if (dtype or float) not in cls.TYPECODES:
+            raise TypeError(f'Points with more than {cls.MAX_SLOTS} dimensions need dtype int or float, not {dtype!r}.')
+        namespace['__slots__'] = ('_coordinates',)
+        namespace['typecode'] = cls.TYPECODES[dtype or float]
+        for i, axis in enumerate(cls._axes(dim)):
+            namespace[axis] = property(lambda self, i=i: self._coordinates[i], doc=f'Get the {axis}-coordinate of the point.')
+        namespace['__init__'] = cls._init_array
+        namespace['__eq__'] = cls._eq_array
+        namespace['__hash__'] = cls._hash_array
+        namespace['__repr__'] = cls._repr_array
+        namespace['__str__'] = cls._str_array
+        namespace['__iter__'] = cls._iter_array
+
+    @classmethod
+    def _compile_methods(cls, dim, dtype, root):
+        """
+        Generate __init__, __eq__, __hash__, __repr__, __str__ and __iter__ specialized for the dimension.
+
+        The coordinates are spelled out in the source, e.g. `self._1 == other._1 and self._2 == other._2`, so no
+        method builds attribute names or loops over the slots at call time.
+        """
+        axes = cls._axes(dim)
+        fields = [f'self._{i}' for i in range(1, dim + 1)]
+        coordinates = ', '.join(f'{{{field}}}' for field in fields)
+        source = '\n'.join([
+            f"def __init__(self, {', '.join(axes)}, /):",
+            *(f'    {field} = {axis if dtype is None else f"dtype({axis})"}' for field, axis in zip(fields, axes)),
+            "def __eq__(self, other):",
+            f"    if isinstance(other, Point) and other.dim == {dim}:",
+            "        return " + ' and '.join(f'{field} == other._{i}' for i, field in enumerate(fields, start=1)),
+            "    return NotImplemented",
+            "def __hash__(self):",
+            f"    return hash(({', '.join(fields)},))",
+            "def __repr__(self):",
+            f"    return f'{{self.__class__.__name__}}({coordinates})'",
+            "def __str__(self):",
+            f"    return f'({coordinates})'",
+            "def __iter__(self):",
+            f"    return iter(({', '.join(fields)},))",
+        ])
+        scope = {'Point': root, 'dtype': dtype}
+        exec(source, scope)
+        return [scope[name] for name in ('__init__', '__eq__', '__hash__', '__repr__', '__str__', '__iter__')]
+
+    def _init_array(self, *coordinates):
         """Initialize the N-dimensional point object with coordinates."""
-        for i, arg in enumerate(args, start=1):
-            setattr(self, f'_{i}', arg)
+        if len(coordinates) != self.dim:
+            raise TypeError(f'{type(self).__name__}() takes {self.dim} coordinates but {len(coordinates)} were given')
+        self._coordinates = array(self.typecode, coordinates)
 
-    def _eq_coordinates(self, other):
+    def _eq_array(self, other):
         """Check if two N-dimensional point objects are equal based on their coordinates."""
-        return isinstance(other, Point) and tuple(getattr(self, f'_{i}') for i in range(1, len(self.__slots__) + 1)) == \
-               tuple(getattr(other, f'_{i}') for i in range(1, len(self.__slots__) + 1))
+        if isinstance(other, Point) and other.dim == self.dim:
+            return self._coordinates == other._coordinates
+        return NotImplemented
 
-    def _hash_coordinates(self):
+    def _hash_array(self):
         """Compute the hash value of the N-dimensional point object based on its coordinates."""
-        return hash(tuple(getattr(self, f'_{i}') for i in range(1, len(self.__slots__) + 1)))
+        return hash(tuple(self._coordinates))
 
-    def _repr_coordinates(self):
+    def _repr_array(self):
         """Get the string representation of the N-dimensional point object."""
-        dim = len(self.__slots__)
-        coord_str = ', '.join(str(getattr(self, f'_{i}')) for i in range(1, dim + 1))
-        return f'Point{dim}D({coord_str})'
+        return f"{type(self).__name__}({', '.join(map(str, self._coordinates))})"
 
-    def _str_coordinates(self):
+    def _str_array(self):
         """Get the user-friendly string representation of the N-dimensional point object."""
-        dim = len(self.__slots__)
-        coord_str = ', '.join(str(getattr(self, f'_{i}')) for i in range(1, dim + 1))
-        return f'({coord_str})'
+        return f"({', '.join(map(str, self._coordinates))})"
+
+    def _iter_array(self):
+        """Iterate over the coordinates of the N-dimensional point object."""
+        return iter(self._coordinates)
+
+
+def make_point_class(dim, dtype=None):
+    """
+    Return the point class for a dimension, creating it on first use.
+
+    The same (dim, dtype) always returns the same class, including the Point2D ... Point5D classes declared below.
+
+    Args:
+        dim (int): Number of coordinates.
+        dtype (type): Optional coordinate type, e.g. float or int, applied to every coordinate. Points with more than
+            SlottedStruct.MAX_SLOTS dimensions are array-backed and store float unless dtype is int.
+
+    Returns:
+        type: A Point subclass named PointND.
+    """
+    try:
+        return _point_classes[dim, dtype]
+    except KeyError:
+        pass
+    doc = f'Class representing a point in {dim}-dimensional space.'
+    return SlottedStruct(f'Point{dim}D', (Point,), {'__doc__': doc, 'dim': dim, 'dtype': dtype})
+
+
+# Packed binary format: HEADER (magic, dtype code, dimension, number of points), then the little-endian coordinates,
+# point after point, as float64 ('d') or int64 ('q').
+MAGIC = b'PNT1'
+HEADER = struct.Struct('<4scIQ')
+
+
+def _pack_points(points):
+    """
+    Pack points of one class as a header followed by their coordinates.
+
+    Untyped points are stored as int64 when every coordinate is an int and as float64 otherwise.
+
+    Raises:
+        OverflowError: If an int coordinate does not fit in the int64 or float64 it is stored as.
+        ValueError: If an int coordinate stored as float64 beside float coordinates has no exact float64 value.
+    """
+    kind = type(points[0])
+    values = list(chain.from_iterable(points))
+    typecode = getattr(kind, 'typecode', None) or SlottedStruct.TYPECODES.get(kind.dtype)
+    if typecode is None:
+        typecode = 'q' if all(isinstance(value, int) for value in values) else 'd'
+    try:
+        coordinates = array(typecode, values)
+    except OverflowError:
+        width = 'int64' if typecode == 'q' else 'float64'
+        raise OverflowError(f'Cannot pack the points exactly. An int coordinate does not fit in {width}.') from None
+    if typecode == 'd' and coordinates.tolist() != values and any(
+            isinstance(value, int) and float(value) != value for value in values):
+        raise ValueError('Cannot pack the points exactly. An int coordinate has no exact float64 value.')
+    if sys.byteorder == 'big':
+        coordinates.byteswap()
+    return HEADER.pack(MAGIC, typecode.encode(), kind.dim, len(points)) + coordinates.tobytes()
+
+
+def _unpack_points(header, payload, cls):
+    """
+    Decode the coordinates of one header into points.
+
+    Array-backed points of a matching typecode keep a memoryview of the payload as their coordinates, so on a
+    little-endian machine no coordinate is copied.
+    """
+    magic, code, dim, count = header
+    if magic != MAGIC:
+        raise ValueError(f'Invalid data. Expected the {MAGIC!r} header, but got {magic!r}.')
+    typecode = code.decode()
+    if typecode not in ('d', 'q'):
+        raise ValueError(f"Invalid data. Expected dtype 'd' or 'q', but got {typecode!r}.")
+    if len(payload) != dim * count * 8:
+        raise ValueError(f'Invalid data. Expected {dim * count * 8} bytes of coordinates, but got {len(payload)}.')
+    if cls is Point:
+        cls = make_point_class(dim, int if typecode == 'q' and dim > SlottedStruct.MAX_SLOTS else None)
+    elif cls.dim != dim:
+        raise ValueError(f'Invalid data. Expected {cls.dim}-dimensional points, but got {dim}.')
+    if sys.byteorder == 'little':
+        values = memoryview(payload).cast(typecode)
+    else:
+        values = array(typecode, payload)
+        values.byteswap()
+    if getattr(cls, 'typecode', None) == typecode and isinstance(values, memoryview):
+        points = []
+        for start in range(0, dim * count, dim):
+            point = cls.__new__(cls)
+            point._coordinates = values[start:start + dim]
+            points.append(point)
+        return points
+    values = values.tolist()
+    return list(map(cls, *(values[i::dim] for i in range(dim))))
+
+
+def dump_many(points, file, chunk_size=65536):
+    """
+    Write points to a binary file object in the packed format, in blocks of at most chunk_size points.
+
+    Consecutive points of the same class share a block, so points of different dimensions and dtypes may be mixed.
+
+    Returns:
+        int: The number of points written.
+    """
+    written = 0
+    for _, run in groupby(points, key=type):
+        while block := list(islice(run, chunk_size)):
+            file.write(_pack_points(block))
+            written += len(block)
+    return written
+
+
+def iter_load(file, cls=None):
+    """
+    Yield the points of a binary file object written by dump_many() or Point.to_bytes(), block by block.
+
+    Args:
+        file: A binary file object.
+        cls (type): The point class to decode into. By default the class is chosen by make_point_class().
+    """
+    while header := file.read(HEADER.size):
+        if len(header) < HEADER.size:
+            raise ValueError('Invalid data. The stream ends inside a header.')
+        header = HEADER.unpack(header)
+        yield from _unpack_points(header, file.read(header[2] * header[3] * 8), cls or Point)
 
 
 class Point(metaclass=SlottedStruct):
     """Base class for N-dimensional points."""
 
-    pass
+    __slots__ = ()
+
+    def to_bytes(self):
+        """Pack the point as a header with its dimension and dtype, followed by its little-endian coordinates."""
+        return _pack_points([self])
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decode one point packed by to_bytes(). Point.from_bytes() picks the class from the header's dimension."""
+        data = memoryview(data)
+        points = _unpack_points(HEADER.unpack_from(data), data[HEADER.size:], cls)
+        if len(points) != 1:
+            raise ValueError(f'Invalid data. Expected one point, but got {len(points)}.')
+        return points[0]
+
 class Point2D(Point):
     """Class representing a point in 2-dimensional space."""
 
@@ -169,18 +406,52 @@ class Point5D(Point):
     pass
 
 # Here the metaclass SlottedStruct dynamically creates classes for N-dimensional points.
-# It is responsible for creating the __slots__, __init__, __eq__, __hash__, __repr__, and __str__ methods for the
-# N-dimensional point classes and also for creating the __new__ method for the N-dimensional point classes.
+# It is responsible for creating the __slots__, the read-only coordinate properties, and __init__, __eq__, __hash__,
+# __repr__, __str__ and __iter__ methods whose source is generated for the dimension of each N-dimensional point class.
+# Above SlottedStruct.MAX_SLOTS dimensions the coordinates share one array.array slot instead.
+# make_point_class() builds and caches the class of any dimension, e.g. for 128-D embedding points.
 
 
 # Test
 
-p1 = Point2D(1, 2)
-p2 = Point3D(1, 2, 3)
-p3 = Point4D(1, 2, 3, 4)
-p4 = Point5D(1, 2, 3, 4, 5)
-
-print(p1)  # Output: (1, 2)
-print(p2)  # Output: (1, 2, 3)
-print(p3)  # Output: (1, 2, 3, 4)
-print(p4)  # Output: (1, 2, 3, 4, 5)
+if __name__ == "__main__":
+    p1 = Point2D(1, 2)
+    p2 = Point3D(1, 2, 3)
+    p3 = Point4D(1, 2, 3, 4)
+    p4 = Point5D(1, 2, 3, 4, 5)
+
+    print(p1)  # Output: (1, 2)
+    print(p2)  # Output: (1, 2, 3)
+    print(p3)  # Output: (1, 2, 3, 4)
+    print(p4)  # Output: (1, 2, 3, 4, 5)
+    print(repr(p1), p2.z, p4.x5)  # Output: Point2D(1, 2) 3 5
+    print(p1 == Point2D(1, 2), len({p1, Point2D(1, 2), p2}))  # Output: True 2
+    try:
+        Point3D(1, 2)
+    except TypeError as e:
+        print(e)  # Output: Point3D.__init__() missing 1 required positional argument: 'z'
+    print(make_point_class(3) is Point3D, make_point_class(12).dim)  # Output: True 12
+    Point128D = make_point_class(128)
+    print(Point128D(*range(128)).x128, make_point_class(128) is Point128D)  # Output: 127.0 True
+
+    import io
+    import pickle
+    import time
+
+    print(Point.from_bytes(p2.to_bytes()) == p2, len(p2.to_bytes()))  # Output: True 41
+    def packed(points):
+        buffer = io.BytesIO()
+        dump_many(points, buffer)
+        return buffer.getvalue()
+
+    points = [Point3D(i, i + 0.5, -i) for i in range(100_000)]
+    for name, dump, load in (("pickle", pickle.dumps, pickle.loads),
+                             ("packed", packed, lambda data: list(iter_load(io.BytesIO(data))))):
+        start = time.perf_counter()
+        data = dump(points)
+        middle = time.perf_counter()
+        loaded = load(data)
+        end = time.perf_counter()
+        assert loaded == points
+        print(f"{name}: {len(data) / len(points):.0f} bytes per point, dump {middle - start:.3f} s, "
+              f"load {end - middle:.3f} s")  # Prints the size and speed of both formats
@@ -33,24 +33,334 @@ that the Hundred class follows the Singleton pattern, allowing only one instance
 Test the implementation by creating multiple instances of the target class (e.g., Hundred) and verifying that they all
 refer to the same object. You can use the is operator to check if two objects are the same instance."""
 
+import asyncio
+import contextvars
+import gc
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
 class SingletonMeta(type):
     """
     Metaclass for implementing the Singleton pattern.
-    This metaclass ensures that only one instance of each class using this metaclass is created.
+    This metaclass ensures that only one instance of each class using this metaclass is created, also when many
+    threads ask for it at the same time.
     """
 
     _instances = {}
+    _construction_times = {}  # class -> seconds spent building its instance
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._singleton_lock = threading.Lock()  # One lock per class, so unrelated singletons never contend
 
     def __call__(cls, *args, **kwargs):
         """
         Override the __call__ method to control instance creation.
         If an instance of the class does not exist, create a new instance and store it.
         If an instance already exists, return the existing instance.
+
+        Once the instance exists it is returned by a single dict lookup, without taking a lock. Until then, callers
+        serialize on the lock of the class and check again, so __init__ runs exactly once.
         """
-        if cls not in cls._instances:
-            cls._instances[cls] = super().__call__(*args, **kwargs)
+        try:
+            return cls._instances[cls]
+        except KeyError:
+            pass
+        with cls._singleton_lock:
+            if cls not in cls._instances:
+                cls._instances[cls] = cls._singleton_build(*args, **kwargs)
         return cls._instances[cls]
 
+    def _singleton_build(cls, *args, **kwargs):
+        """
+        Create an instance with the regular __new__ and __init__, recording how long it took.
+        """
+        start = time.perf_counter()
+        instance = type.__call__(cls, *args, **kwargs)
+        SingletonMeta._construction_times[cls] = time.perf_counter() - start
+        return instance
+
+    def _singleton_clear(cls):
+        """
+        Forget the instances of the class, so the next call builds a new one. Called with the class lock held.
+        """
+        SingletonMeta._instances.pop(cls, None)
+
+
+class AsyncSingletonMeta(SingletonMeta):
+    """
+    Singleton metaclass for classes whose setup is a coroutine, `async def __ainit__(self, *args, **kwargs)`.
+
+    `await Cls.instance()` builds the instance once; tasks that ask while it is being built await the same
+    construction instead of starting their own. If the construction fails, the next call tries again. Construction
+    runs on the event loop of the first caller, so all callers must share that loop.
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._singleton_task = None
+
+    def __call__(cls, *args, **kwargs):
+        try:
+            return cls._instances[cls]
+        except KeyError:
+            message = f"{cls.__name__} is built asynchronously; use 'await {cls.__name__}.instance()'."
+            raise RuntimeError(message) from None
+
+    async def instance(cls, *args, **kwargs):
+        """
+        Return the instance, building it with __ainit__(*args, **kwargs) on the first call.
+        """
+        try:
+            return cls._instances[cls]
+        except KeyError:
+            pass
+        if cls._singleton_task is None:
+            cls._singleton_task = asyncio.ensure_future(cls._construct(*args, **kwargs))
+        try:
+            return await asyncio.shield(cls._singleton_task)  # A cancelled caller does not cancel the construction
+        finally:
+            if cls._singleton_task is not None and cls._singleton_task.done():
+                cls._singleton_task = None
+
+    async def _construct(cls, *args, **kwargs):
+        start = time.perf_counter()
+        instance = cls.__new__(cls)
+        await instance.__ainit__(*args, **kwargs)
+        SingletonMeta._construction_times[cls] = time.perf_counter() - start
+        cls._instances[cls] = instance
+        return instance
+
+
+class MultitonMeta(SingletonMeta):
+    """
+    One instance per distinct constructor arguments, e.g. one client per URL.
+
+    Instances are keyed by the hashed positional and keyword arguments, so the arguments must be hashable. The class
+    keywords bound the cache: `maxsize=N` keeps the N most recently used instances, `weak=True` keeps an instance only
+    while it is referenced elsewhere. Subclasses inherit the bounds they do not set.
+
+        class Client(metaclass=MultitonMeta, maxsize=128): ...
+    """
+
+    def __new__(mcls, name, bases, namespace, maxsize=None, weak=None):
+        return super().__new__(mcls, name, bases, namespace)
+
+    def __init__(cls, name, bases, namespace, maxsize=None, weak=None):
+        super().__init__(name, bases, namespace)
+        maxsize = getattr(cls, "_multiton_maxsize", None) if maxsize is None else maxsize
+        weak = getattr(cls, "_multiton_weak", False) if weak is None else weak
+        if weak and maxsize is not None:
+            raise TypeError("A multiton is bounded either by maxsize or by weak references, not both.")
+        cls._multiton_maxsize = maxsize
+        cls._multiton_weak = weak
+        cls._multiton_building = {}  # key -> [lock, number of callers using it], while an instance is built
+        cls._singleton_clear()
+
+    def __call__(cls, *args, **kwargs):
+        """
+        Return the instance for the arguments. An existing instance is returned by a lock-free dict lookup; a new
+        one is built under a lock of its own key, so slow constructors do not hold up calls for other keys.
+        """
+        key = (args, frozenset(kwargs.items()))
+        instances = cls._multiton_instances
+        instance = instances.get(key)
+        if instance is not None:
+            if cls._multiton_maxsize is not None:
+                try:
+                    instances.move_to_end(key)
+                except KeyError:
+                    pass  # Evicted by another thread in the meantime
+            return instance
+        with cls._singleton_lock:
+            building = cls._multiton_building.get(key)
+            if building is None:
+                building = cls._multiton_building[key] = [threading.Lock(), 0]
+            building[1] += 1
+        try:
+            with building[0]:
+                instance = instances.get(key)
+                if instance is None:
+                    instance = cls._singleton_build(*args, **kwargs)
+                    with cls._singleton_lock:
+                        instances[key] = instance
+                        if cls._multiton_maxsize is not None and len(instances) > cls._multiton_maxsize:
+                            instances.popitem(last=False)  # Evict the least recently used instance
+        finally:
+            with cls._singleton_lock:
+                building[1] -= 1
+                if not building[1]:
+                    del cls._multiton_building[key]
+        return instance
+
+    def _singleton_clear(cls):
+        cls._multiton_instances = weakref.WeakValueDictionary() if cls._multiton_weak else OrderedDict()
+
+
+class WeakSingletonMeta(SingletonMeta):
+    """
+    One instance at a time, held through a weak reference: once nothing else refers to it, it can be collected, and
+    the next call builds a new one.
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._singleton_clear()
+
+    def __call__(cls, *args, **kwargs):
+        instance = cls._singleton_ref()
+        if instance is None:
+            with cls._singleton_lock:
+                instance = cls._singleton_ref()
+                if instance is None:
+                    instance = cls._singleton_build(*args, **kwargs)
+                    cls._singleton_ref = weakref.ref(instance)
+        return instance
+
+    def _singleton_clear(cls):
+        cls._singleton_ref = lambda: None
+
+
+class ThreadLocalSingletonMeta(SingletonMeta):
+    """
+    One instance per thread. The instance of a thread is released when the thread ends.
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._singleton_clear()
+
+    def __call__(cls, *args, **kwargs):
+        local = cls._singleton_local
+        try:
+            return local.instance
+        except AttributeError:
+            local.instance = cls._singleton_build(*args, **kwargs)
+            return local.instance
+
+    def _singleton_clear(cls):
+        cls._singleton_local = threading.local()
+
+
+class ContextSingletonMeta(SingletonMeta):
+    """
+    One instance per contextvars context. Each asyncio task runs in a copy of the context it was created in, so a
+    task that builds the instance does not share it with its siblings, while tasks started after it inherit it.
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._singleton_clear()
+
+    def __call__(cls, *args, **kwargs):
+        instance = cls._singleton_var.get()
+        if instance is None:
+            instance = cls._singleton_build(*args, **kwargs)
+            cls._singleton_var.set(instance)
+        return instance
+
+    def _singleton_clear(cls):
+        cls._singleton_var = contextvars.ContextVar(f"{cls.__name__} instance", default=None)
+
+
+class SingletonRegistry:
+    """
+    Declares singleton classes as lazy or eager.
+
+    Lazy singletons are built on their first call, as usual. Eager ones are built ahead of traffic by warm_up(), in
+    parallel on a thread pool, or by warm_up_async(), which also awaits AsyncSingletonMeta classes.
+    """
+
+    def __init__(self):
+        self._entries = {}  # class -> (eager, args, kwargs)
+
+    def register(self, cls=None, *, eager=False, args=(), kwargs=None):
+        """
+        Register a singleton class; usable as a decorator, with or without arguments.
+
+        Args:
+            cls (type): A class whose metaclass is SingletonMeta or AsyncSingletonMeta.
+            eager (bool): Whether warm_up() builds the instance.
+            args (tuple): Positional arguments of the construction.
+            kwargs (dict): Keyword arguments of the construction.
+        """
+        def register(cls):
+            if not isinstance(cls, SingletonMeta):
+                raise TypeError(f"{cls.__name__} is not a singleton class.")
+            self._entries[cls] = (eager, tuple(args), dict(kwargs or {}))
+            return cls
+
+        return register if cls is None else register(cls)
+
+    def eager(self):
+        """
+        Return the registered eager classes.
+        """
+        return [cls for cls, (eager, _, _) in self._entries.items() if eager]
+
+    def warm_up(self, max_workers=None):
+        """
+        Build every eager singleton that does not exist yet, in parallel on a thread pool.
+
+        AsyncSingletonMeta classes each run their construction on a new event loop in a worker thread; use
+        warm_up_async() when the instances hold resources tied to the application's event loop.
+
+        Returns:
+            dict: The construction time in seconds of every eager singleton.
+
+        Raises:
+            Exception: The first error raised by a construction, after all of them have finished.
+        """
+        def build(cls):
+            _, args, kwargs = self._entries[cls]
+            if isinstance(cls, AsyncSingletonMeta):
+                return asyncio.run(cls.instance(*args, **kwargs))
+            return cls(*args, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(build, cls) for cls in self.eager()]
+        for future in futures:
+            future.result()
+        return self.construction_times(self.eager())
+
+    async def warm_up_async(self):
+        """
+        Build every eager singleton concurrently on the running loop: AsyncSingletonMeta classes are awaited,
+        the others are built in worker threads.
+
+        Returns:
+            dict: The construction time in seconds of every eager singleton.
+        """
+        def build(cls):
+            _, args, kwargs = self._entries[cls]
+            if isinstance(cls, AsyncSingletonMeta):
+                return cls.instance(*args, **kwargs)
+            return asyncio.to_thread(cls, *args, **kwargs)
+
+        await asyncio.gather(*map(build, self.eager()))
+        return self.construction_times(self.eager())
+
+    def construction_times(self, classes=None):
+        """
+        Return the construction time in seconds of the built singletons among classes, by default the registered ones.
+        """
+        times = SingletonMeta._construction_times
+        return {cls.__name__: times[cls] for cls in (self._entries if classes is None else classes) if cls in times}
+
+    def reset(self, *classes):
+        """
+        Drop the instances of the given singleton classes, by default of all registered ones, so the next call builds
+        them again. Meant for tests.
+        """
+        for cls in classes or list(self._entries):
+            with cls._singleton_lock:
+                cls._singleton_clear()
+                SingletonMeta._construction_times.pop(cls, None)
+
 
 class Hundred(metaclass=SingletonMeta):
     """
@@ -79,17 +389,168 @@ class Thousand(metaclass=SingletonMeta):
     def __repr__(self):
         return f'{self.name}: {self.value}'
 
+def stress_test(threads=64, rounds=20, meta=SingletonMeta):
+    """
+    Release many threads at once on a fresh singleton class with a slow __init__ and count the constructions.
+
+    Returns:
+        int: The largest number of constructions, or of distinct instances returned, seen in one round; 1 when the
+            metaclass is thread-safe.
+    """
+    worst = 0
+    for _ in range(rounds):
+        constructions = []
+
+        class Slow(metaclass=meta):
+            def __init__(self):
+                constructions.append(self)
+                time.sleep(0.001)  # An expensive setup widens the window between the check and the store
+
+        barrier = threading.Barrier(threads)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(Slow())
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        worst = max(worst, len(constructions), len(set(map(id, results))))
+        meta._instances.pop(Slow, None)
+    return worst
+
+
+class UnlockedSingletonMeta(type):
+    """
+    The check-then-create metaclass without a lock, kept for comparison in the stress test.
+    """
+
+    _instances = {}
+
+    def __call__(cls, *args, **kwargs):
+        if cls not in cls._instances:
+            cls._instances[cls] = super().__call__(*args, **kwargs)
+        return cls._instances[cls]
+
+
 # Test
 
-h1 = Hundred()  # this will create a new instance
-h2 = Hundred()  # this will return the previously created instance
-print(h1)       # Output: hundred: 100
-print(h2)       # Output: hundred: 100
-print(h1 is h2) # Output: True - both variables refer to the same object
+if __name__ == "__main__":
+    h1 = Hundred()  # this will create a new instance
+    h2 = Hundred()  # this will return the previously created instance
+    print(h1)       # Output: hundred: 100
+    print(h2)       # Output: hundred: 100
+    print(h1 is h2) # Output: True - both variables refer to the same object
+
+    t1 = Thousand()  # this will create a new instance
+    t2 = Thousand()  # this will return the previously created instance
+    print(t1)        # Output: thousand: 1000
+    print(t2)        # Output: thousand: 1000
+    print(t1 is t2)  # Output: True - both variables refer to the same object
+
+
+    class Config(metaclass=AsyncSingletonMeta):
+        """
+        Singleton whose setup awaits I/O.
+        """
+
+        async def __ainit__(self, path):
+            await asyncio.sleep(0.01)  # Stands in for reading the configuration
+            self.path = path
+
+
+    async def main():
+        configs = await asyncio.gather(*(Config.instance('settings.toml') for _ in range(10)))
+        print(all(config is configs[0] for config in configs), Config() is configs[0])  # Output: True True
+
+
+    print(stress_test(meta=UnlockedSingletonMeta))  # Prints the worst round; usually more than 1, as without the lock several threads can run __init__
+    print(stress_test())  # Output: 1 - the lock lets exactly one thread run __init__
+    asyncio.run(main())
+
+    registry = SingletonRegistry()
+
+
+    @registry.register(eager=True)
+    class Model(metaclass=SingletonMeta):
+        """
+        Singleton with an expensive setup, built at startup.
+        """
+
+        def __init__(self):
+            time.sleep(0.2)  # Stands in for loading model weights
+
+
+    @registry.register(eager=True, args=('postgres://localhost/app',))
+    class Pool(metaclass=AsyncSingletonMeta):
+        """
+        Singleton whose setup awaits a connection, built at startup.
+        """
+
+        async def __ainit__(self, url):
+            await asyncio.sleep(0.2)  # Stands in for opening the connections
+            self.url = url
+
+
+    registry.register(Hundred)  # Lazy: built on its first call, as before
+
+    start = time.perf_counter()
+    times = registry.warm_up()
+    elapsed = time.perf_counter() - start
+    print(sorted(times))  # Output: ['Model', 'Pool']
+    print(f"warm-up {elapsed:.2f} s for {sum(times.values()):.2f} s of constructions")  # Prints about 0.2 s for 0.4 s, as both are built in parallel
+    print(registry.construction_times()['Model'] >= 0.2)  # Output: True
+
+    registry.reset()
+    print(Hundred() is h1, asyncio.run(registry.warm_up_async()).keys())  # Output: False dict_keys(['Model', 'Pool'])
+
+
+    class Client(metaclass=MultitonMeta, maxsize=2):
+        def __init__(self, url):
+            self.url = url
+
+
+    print(Client('a') is Client('a'), Client('a') is Client('b'))  # Output: True False
+    Client('a')  # Marks Client('a') as recently used
+    Client('c')  # Evicts Client('b'), the least recently used
+    print(sorted(key[0][0] for key in Client._multiton_instances))  # Output: ['a', 'c']
+
+
+    class Buffer(metaclass=WeakSingletonMeta):
+        def __init__(self):
+            self.data = bytearray(10 ** 6)
+
+
+    Buffer()  # Nothing keeps the instance, so it is collected
+    gc.collect()
+    print(Buffer._singleton_ref() is None)  # Output: True
+
+
+    class Session(metaclass=ThreadLocalSingletonMeta):
+        pass
+
+
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(Session()))
+    thread.start()
+    thread.join()
+    print(Session() is Session(), Session() is sessions[0])  # Output: True False
+
+
+    class RequestState(metaclass=ContextSingletonMeta):
+        pass
+
+
+    async def handle():
+        return RequestState() is RequestState(), RequestState()
+
+
+    async def serve():
+        results = await asyncio.gather(handle(), handle())
+        print(all(same for same, _ in results), results[0][1] is results[1][1])  # Output: True False
 
-t1 = Thousand()  # this will create a new instance
-t2 = Thousand()  # this will return the previously created instance
-print(t1)        # Output: thousand: 1000
-print(t2)        # Output: thousand: 1000
-print(t1 is t2)  # Output: True - both variables refer to the same object
 
+    asyncio.run(serve())
@@ -0,0 +1,334 @@
+"""k-nearest-neighbour and radius search over N-dimensional points.
+
+NearestNeighborIndex holds its points in one NumPy array and indexes them with a k-d tree: every node splits its points
+at the median of the dimension with the largest spread, down to leaves of at most leaf_size points. A query walks
+the tree nearest side first, skips every subtree that lies farther away than the current k-th neighbour (or the
+radius), and compares the query with the points of a leaf in one vectorized step.
+
+In high dimensions almost no subtree can be skipped, so above brute_force_dim the index compares the query with all
+points at once, as a matrix-vector product.
+
+Inserted points are kept in a small unindexed buffer that queries scan alongside the tree; when the buffer grows
+past rebuild_ratio times the size of the tree, the tree is rebuilt over all points.
+"""
+
+import heapq
+import math
+import time
+
+from NDimensionalPointMetaclass import Point
+from point_array import PointArray
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class NearestNeighborIndex:
+    """
+    k-d tree over points of one dimension with a vectorized brute-force fallback for high dimensions.
+
+    Points are identified by their insertion number: query() and query_radius() return the numbers of the matching
+    points, which index the `points` PointArray.
+    """
+
+    def __init__(self, points=(), leaf_size=32, brute_force_dim=6, rebuild_ratio=0.25):
+        """
+        Initialize the index and bulk load the given points.
+
+        Args:
+            points: A PointArray, a sequence of PointND instances or an (n, dim) array-like.
+            leaf_size (int): Maximum number of points in a leaf of the tree.
+            brute_force_dim (int): Highest dimension indexed by the tree; larger points are searched by brute force.
+            rebuild_ratio (float): Size of the insert buffer, relative to the tree, that triggers a rebuild.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+        """
+        if np is None:
+            raise ImportError("NearestNeighborIndex requires NumPy.")
+        self.leaf_size = leaf_size
+        self.brute_force_dim = brute_force_dim
+        self.rebuild_ratio = rebuild_ratio
+        self._data = None  # Points covered by the tree, in insertion order
+        self._pending = []  # Inserted points not yet in the tree
+        self._pending_rows = None
+        self._build(None)
+        self.bulk_load(points)
+
+    def __len__(self):
+        return (0 if self._data is None else len(self._data)) + len(self._pending)
+
+    @property
+    def dim(self):
+        if self._data is not None:
+            return self._data.shape[1]
+        return len(self._pending[0]) if self._pending else None
+
+    @property
+    def points(self):
+        """
+        All indexed points as a PointArray, in insertion order.
+
+        Raises:
+            ValueError: If the index is empty, since a PointArray needs a dimension.
+        """
+        if not len(self):
+            raise ValueError("Invalid index. An empty index has no dimension, so it has no PointArray of points.")
+        self._flush()
+        return PointArray(self._data)
+
+    @staticmethod
+    def _rows(points):
+        if isinstance(points, PointArray):
+            return points.data
+        points = list(points) if not hasattr(points, "__array__") else points
+        if not len(points):
+            return np.empty((0, 0))
+        if isinstance(points[0], Point):
+            return PointArray.from_points(points).data
+        return np.asarray(points, dtype=np.float64).reshape(len(points), -1)
+
+    def _vector(self, point):
+        vector = np.array(tuple(point) if isinstance(point, Point) else point, dtype=np.float64)
+        if vector.shape != (self.dim,):
+            raise ValueError(f"Invalid point. Expected {self.dim} coordinates, but got shape {vector.shape}.")
+        return vector
+
+    def bulk_load(self, points):
+        """
+        Add many points at once and rebuild the tree over all points.
+        """
+        rows = self._rows(points)
+        if not len(rows):
+            return
+        if self.dim is not None and rows.shape[1] != self.dim:
+            raise ValueError(f"Invalid points. Expected {self.dim} coordinates, but got {rows.shape[1]}.")
+        self._flush()
+        if self._data is None:
+            self._build(np.array(rows, dtype=np.float64))  # A copy, so the index does not share the caller's array
+        else:
+            self._build(np.vstack((self._data, rows)))
+
+    def insert(self, point):
+        """
+        Add one point. It is searched from the insert buffer until the next rebuild.
+
+        Returns:
+            int: The insertion number of the point.
+        """
+        vector = np.array(tuple(point) if isinstance(point, Point) else point, dtype=np.float64)
+        if self.dim is not None and vector.shape != (self.dim,):
+            raise ValueError(f"Invalid point. Expected {self.dim} coordinates, but got shape {vector.shape}.")
+        self._pending.append(vector)
+        self._pending_rows = None
+        number = len(self) - 1
+        if len(self._pending) > max(self.leaf_size, self.rebuild_ratio * (number + 1 - len(self._pending))):
+            self._flush()
+        return number
+
+    def _flush(self):
+        if not self._pending:
+            return
+        pending = np.vstack(self._pending)
+        self._build(pending if self._data is None else np.vstack((self._data, pending)))
+        self._pending = []
+        self._pending_rows = None
+
+    def _build(self, data):
+        """
+        Build the k-d tree over data. The points are stored in leaf order, with _order mapping them back.
+        """
+        self._data = data
+        self._split_dim, self._split_value, self._children, self._ranges = [], [], [], []
+        if data is None:
+            return
+        self._sq_norms = np.einsum("ij,ij->i", data, data)
+        order = np.arange(len(data))
+        if data.shape[1] <= self.brute_force_dim:
+            stack = [(0, len(data), None)]
+            while stack:
+                start, end, parent = stack.pop()
+                node = len(self._ranges)
+                if parent is not None:
+                    self._children[parent[0]][parent[1]] = node
+                self._ranges.append((start, end))
+                self._children.append([None, None])
+                block = data[order[start:end]]
+                spread = block.max(axis=0) - block.min(axis=0)
+                axis = int(spread.argmax())
+                if end - start <= self.leaf_size or not spread[axis]:
+                    self._split_dim.append(-1)
+                    self._split_value.append(0.0)
+                    continue
+                middle = (start + end) // 2
+                order[start:end] = order[start:end][np.argpartition(block[:, axis], middle - start)]
+                self._split_dim.append(axis)
+                self._split_value.append(float(data[order[middle], axis]))
+                stack.append((middle, end, (node, 1)))
+                stack.append((start, middle, (node, 0)))
+        self._order = order
+        self._leaf_data = data[order]
+
+    def query(self, point, k=1):
+        """
+        Return the k points nearest to point.
+
+        Args:
+            point: A PointND instance or a sequence of coordinates.
+            k (int): Number of neighbours.
+
+        Returns:
+            tuple: (distances, numbers), two arrays sorted by increasing Euclidean distance.
+
+        Raises:
+            ValueError: If k is less than 1.
+        """
+        if k < 1:
+            raise ValueError(f"Invalid k. Expected at least 1 neighbour, but got {k}.")
+        if not len(self):
+            return np.empty(0), np.empty(0, dtype=np.intp)
+        vector = self._vector(point)
+        best = []  # Max-heap of (-squared distance, number)
+
+        def consider(squared, numbers):
+            if len(best) == k:
+                keep = squared < -best[0][0]
+                squared, numbers = squared[keep], numbers[keep]
+            if len(squared) > k:
+                nearest = np.argpartition(squared, k - 1)[:k]
+                squared, numbers = squared[nearest], numbers[nearest]
+            for distance, number in zip(squared.tolist(), numbers.tolist()):
+                if len(best) < k:
+                    heapq.heappush(best, (-distance, number))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, number))
+
+        def bound():
+            return -best[0][0] if len(best) == k else math.inf
+
+        self._search(vector, consider, bound)
+        best.sort(reverse=True)
+        return np.sqrt([-distance for distance, _ in best]), np.array([number for _, number in best], dtype=np.intp)
+
+    def query_radius(self, point, radius):
+        """
+        Return the points within radius of point.
+
+        Args:
+            point: A PointND instance or a sequence of coordinates.
+            radius (float): The search radius, inclusive.
+
+        Returns:
+            tuple: (distances, numbers), two arrays sorted by increasing Euclidean distance.
+
+        Raises:
+            ValueError: If radius is negative.
+        """
+        if radius < 0:
+            raise ValueError(f"Invalid radius. Expected a non-negative distance, but got {radius}.")
+        if not len(self):
+            return np.empty(0), np.empty(0, dtype=np.intp)
+        vector = self._vector(point)
+        limit = radius * radius
+        found_squared, found_numbers = [], []
+
+        def consider(squared, numbers):
+            keep = squared <= limit
+            found_squared.append(squared[keep])
+            found_numbers.append(numbers[keep])
+
+        self._search(vector, consider, lambda: limit, inclusive=True)
+        squared = np.concatenate(found_squared)
+        order = np.argsort(squared, kind="stable")
+        return np.sqrt(squared[order]), np.concatenate(found_numbers)[order]
+
+    def _search(self, vector, consider, bound, inclusive=False):
+        """
+        Pass the squared distances of every candidate point to consider(), skipping the subtrees farther than bound().
+        """
+        if self._data is not None:
+            if self._data.shape[1] > self.brute_force_dim:
+                squared = self._sq_norms - 2 * (self._data @ vector) + vector @ vector
+                consider(np.maximum(squared, 0), np.arange(len(self._data)))
+            else:
+                self._search_tree(vector, consider, bound, inclusive)
+        if self._pending:
+            if self._pending_rows is None:
+                self._pending_rows = np.vstack(self._pending)
+            difference = self._pending_rows - vector
+            start = 0 if self._data is None else len(self._data)
+            consider(np.einsum("ij,ij->i", difference, difference), np.arange(start, start + len(self._pending)))
+
+    def _search_tree(self, vector, consider, bound, inclusive):
+        coordinates = vector.tolist()
+        split_dim, split_value, children, ranges = self._split_dim, self._split_value, self._children, self._ranges
+        leaf_data, order = self._leaf_data, self._order
+        stack = [(0, 0.0)]
+        while stack:
+            node, lower = stack.pop()
+            limit = bound()
+            if lower > limit or (lower == limit and not inclusive):
+                continue
+            axis = split_dim[node]
+            if axis < 0:
+                start, end = ranges[node]
+                difference = leaf_data[start:end] - vector
+                consider(np.einsum("ij,ij->i", difference, difference), order[start:end])
+                continue
+            offset = coordinates[axis] - split_value[node]
+            near, far = children[node] if offset < 0 else children[node][::-1]
+            stack.append((far, max(lower, offset * offset)))
+            stack.append((near, lower))
+
+
+def benchmark(count=50_000, queries=20, k=10, dims=(2, 4, 8, 16, 32, 64), seed=0):
+    """
+    Compare k-nearest-neighbour queries through the k-d tree, the vectorized brute force and a Python scan over
+    point objects, for points of several dimensions.
+
+    Args:
+        count (int): Number of random points per dimension.
+        queries (int): Number of queries per dimension.
+        k (int): Number of neighbours per query.
+        dims (tuple): Dimensions to measure.
+        seed (int): Seed of the random points.
+    """
+    rng = np.random.default_rng(seed)
+    for dim in dims:
+        data = PointArray(rng.random((count, dim)))
+        targets = rng.random((queries, dim))
+        start = time.perf_counter()
+        tree = NearestNeighborIndex(data, brute_force_dim=max(dims))
+        build = time.perf_counter() - start
+        brute = NearestNeighborIndex(data, brute_force_dim=0)
+        points = data.to_points()
+
+        timings = {}
+        results = {}
+        for name, search in (("tree", lambda q: tree.query(q, k)[1]), ("brute force", lambda q: brute.query(q, k)[1]),
+                             ("python scan", lambda q: np.array(sorted(range(count), key=lambda i: math.dist(points[i], q))[:k]))):
+            scanned = targets[:3] if name == "python scan" else targets
+            start = time.perf_counter()
+            results[name] = [set(search(q).tolist()) for q in scanned]
+            timings[name] = (time.perf_counter() - start) / len(scanned)
+        assert results["tree"] == results["brute force"]
+        assert results["python scan"] == results["tree"][:3]
+        print(f"dim {dim:2}: build {build:.2f} s, " + ", ".join(f"{name} {timings[name] * 1e3:.2f} ms"
+                                                                for name in timings) + " per query")
+
+
+if __name__ == "__main__":
+    from NDimensionalPointMetaclass import make_point_class
+
+    Point2D = make_point_class(2)
+    index = NearestNeighborIndex([Point2D(0, 0), Point2D(1, 1), Point2D(5, 5), Point2D(6, 5)])
+    distances, numbers = index.query(Point2D(5, 4), k=2)
+    print(numbers, distances)  # Output: [2 3] [1.         1.41421356]
+    print(index.query_radius(Point2D(0, 0), 1.5)[1])  # Output: [0 1]
+
+    print(index.insert(Point2D(5, 4)), index.query(Point2D(5, 4))[1])  # Output: 4 [4]
+    print(index.points[4])  # Output: (5.0, 4.0)
+
+    benchmark()  # Prints the time per query of the tree, the brute force and a Python scan for dimensions 2 to 64
@@ -0,0 +1,246 @@
+"""Columnar container for many N-dimensional points.
+
+Point classes made by SlottedStruct cost one Python object per point. PointArray keeps n points of one dimension in a
+single (n, dim) NumPy array and only builds point objects when they are indexed. Distances, norms, sums, scaling,
+hashing and deduplication run over whole columns at once.
+
+Indexing returns an instance of the matching PointND class. Above SlottedStruct.MAX_SLOTS dimensions the point is a
+view: its coordinates are a memoryview of the row, so no coordinate is copied. Points with fewer dimensions are
+detached copies.
+"""
+
+import time
+from operator import attrgetter
+
+from NDimensionalPointMetaclass import HEADER, MAGIC, Point, SlottedStruct, make_point_class
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class PointArray:
+    """
+    Store of n points of one dimension as an (n, dim) array of float64 or int64 coordinates.
+    """
+
+    def __init__(self, coordinates, dtype=float):
+        """
+        Initialize the array from a 2-D array-like of coordinates, one row per point.
+
+        Args:
+            coordinates (array-like): The coordinates, with shape (n, dim).
+            dtype (type): float or int.
+
+        Raises:
+            ImportError: If NumPy is not installed.
+            ValueError: If the coordinates are not two-dimensional or dtype is not float or int.
+        """
+        if np is None:
+            raise ImportError("PointArray requires NumPy.")
+        if dtype not in (float, int):
+            raise ValueError(f"Invalid dtype. Expected float or int, but got {dtype!r}.")
+        data = np.ascontiguousarray(coordinates, dtype=np.float64 if dtype is float else np.int64)
+        if data.ndim != 2 or not data.shape[1]:
+            raise ValueError(f"Invalid shape. Expected (n, dim) coordinates, but got {data.shape}.")
+        self.data = data
+        self.point_class = make_point_class(data.shape[1], None if dtype is float else int)
+
+    @classmethod
+    def from_points(cls, points, dtype=float):
+        """
+        Create an array from a sequence of points of one dimension.
+
+        The coordinates are gathered by C-level iteration: attrgetter over the slots of slotted points, one bytes join
+        over the coordinate buffers of array-backed points.
+        """
+        points = list(points)
+        if not points:
+            raise ValueError("Cannot infer the dimension of an empty sequence of points.")
+        kinds = set(map(type, points))
+        kind = kinds.pop()
+        target = np.float64 if dtype is float else np.int64
+        if kinds or not isinstance(kind, SlottedStruct):
+            rows = np.array(list(map(tuple, points)), dtype=target)
+        elif kind.__slots__ == ("_coordinates",):
+            buffer = b"".join(map(attrgetter("_coordinates"), points))
+            rows = np.frombuffer(buffer, dtype=np.dtype(kind.typecode)).reshape(len(points), kind.dim)
+        else:
+            rows = np.array(list(map(attrgetter(*kind.__slots__), points)), dtype=target).reshape(len(points), kind.dim)
+        return cls(rows, dtype)
+
+    def to_points(self):
+        """
+        Return the points as a list of PointND instances, detached from the array.
+        """
+        return list(map(self.point_class, *self.data.T.tolist()))
+
+    def to_bytes(self):
+        """
+        Pack the points in the format of Point.to_bytes() and dump_many(): one header, then the little-endian rows.
+        """
+        integer = self.data.dtype.kind == "i"
+        header = HEADER.pack(MAGIC, b"q" if integer else b"d", self.dim, len(self))
+        return header + self.data.astype("<i8" if integer else "<f8", copy=False).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Decode one block of packed points. The array is a read-only view of data, so no coordinate is copied.
+        """
+        magic, code, dim, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"Invalid data. Expected the {MAGIC!r} header, but got {magic!r}.")
+        if code not in (b"d", b"q"):
+            raise ValueError(f"Invalid data. Expected dtype 'd' or 'q', but got {code!r}.")
+        if len(data) != HEADER.size + dim * count * 8:
+            raise ValueError(f"Invalid data. Expected {dim * count * 8} bytes of coordinates, "
+                             f"but got {len(data) - HEADER.size}.")
+        rows = np.frombuffer(data, dtype="<f8" if code == b"d" else "<i8", offset=HEADER.size).reshape(count, dim)
+        return cls(rows, float if code == b"d" else int)
+
+    @property
+    def dim(self):
+        return self.data.shape[1]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return map(self.__getitem__, range(len(self)))
+
+    def __getitem__(self, index):
+        """
+        Return point number index as a PointND, or a new PointArray for a slice, mask or index array.
+        """
+        if isinstance(index, (int, np.integer)):
+            row = self.data[index]
+            cls = self.point_class
+            if cls.__slots__ == ("_coordinates",):
+                point = cls.__new__(cls)
+                point._coordinates = memoryview(row)
+                return point
+            return cls(*row.tolist())
+        return PointArray(self.data[index], int if self.data.dtype.kind == "i" else float)
+
+    def __repr__(self):
+        return f"PointArray({len(self)} points, dim {self.dim})"
+
+    def _operand(self, other):
+        if isinstance(other, PointArray):
+            return other.data
+        if isinstance(other, Point):
+            return np.array(tuple(other))
+        return np.asarray(other)
+
+    def distance(self, other):
+        """
+        Return the Euclidean distance of every point to a point, or row-wise to the points of another PointArray.
+        """
+        return np.linalg.norm(self.data - self._operand(other), axis=1)
+
+    def norm(self):
+        """
+        Return the Euclidean norm of every point.
+        """
+        return np.linalg.norm(self.data, axis=1)
+
+    def add(self, other):
+        """
+        Return a new PointArray translated by a point, or added row-wise to another PointArray.
+        """
+        data = self.data + self._operand(other)
+        return PointArray(data, int if data.dtype.kind == "i" else float)
+
+    def scale(self, factor):
+        """
+        Return a new PointArray with every coordinate multiplied by factor, a number or one factor per dimension.
+        """
+        data = self.data * self._operand(factor)
+        return PointArray(data, int if data.dtype.kind == "i" else float)
+
+    __add__ = add
+    __mul__ = scale
+
+    def hashes(self):
+        """
+        Return a uint64 hash of every point, computed one column at a time.
+
+        Equal points get equal hashes (0.0 and -0.0 included). The values are not those of hash(point).
+        """
+        bits = (self.data + 0).view(np.uint64)  # Adding 0 turns -0.0 into 0.0
+        hashes = np.full(len(self), 0xCBF29CE484222325, dtype=np.uint64)
+        for column in bits.T:
+            hashes ^= column
+            hashes *= np.uint64(0x100000001B3)
+            hashes ^= hashes >> np.uint64(29)
+        return hashes
+
+    def unique(self):
+        """
+        Return a new PointArray without duplicate points, keeping the first occurrence of each in order.
+
+        Points are grouped by their hashes; points in the same group are compared, and the rare hash collision falls
+        back to an exact byte-wise deduplication.
+        """
+        if not len(self):
+            return self[:0]
+        data = self.data
+        hashes = self.hashes()
+        order = np.argsort(hashes, kind="stable")
+        ordered = hashes[order]
+        same = ordered[1:] == ordered[:-1]
+        if (data[order[1:][same]] == data[order[:-1][same]]).all():
+            first = order[np.concatenate(([True], ~same))]
+        else:
+            rows = np.ascontiguousarray(data + 0).view(np.dtype((np.void, data.itemsize * self.dim))).ravel()
+            first = np.unique(rows, return_index=True)[1]
+        return self[np.sort(first)]
+
+
+def benchmark(count=1_000_000, dim=3, seed=0):
+    """
+    Time the conversion between a list of points and a PointArray, and the vectorized operations.
+
+    Args:
+        count (int): Number of points.
+        dim (int): Dimension of the points.
+        seed (int): Seed of the random coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    coordinates = rng.integers(0, 100, size=(count, dim)).astype(np.float64)
+    points = PointArray(coordinates).to_points()
+
+    def timed(name, function):
+        start = time.perf_counter()
+        result = function()
+        print(f"{name}: {time.perf_counter() - start:.3f} s")
+        return result
+
+    array = timed(f"from_points of {count} {dim}-D points", lambda: PointArray.from_points(points))
+    timed("to_points", array.to_points)
+    timed("distance", lambda: array.distance(points[0]))
+    timed("hashes", array.hashes)
+    unique = timed("unique", array.unique)
+    timed("set of point objects (reference)", lambda: set(points))
+    assert len(unique) == len(set(points))
+
+
+if __name__ == "__main__":
+    Point3D = make_point_class(3)
+    array = PointArray.from_points([Point3D(0, 0, 0), Point3D(3, 4, 0), Point3D(3, 4, 0)])
+    print(array)  # Output: PointArray(3 points, dim 3)
+    print(array[1], array[1] == Point3D(3, 4, 0))  # Output: (3.0, 4.0, 0.0) True
+    print(array.norm())  # Output: [0. 5. 5.]
+    print(array.distance(Point3D(3, 4, 0)))  # Output: [5. 0. 0.]
+    print(array.add(Point3D(1, 1, 1)).scale(2)[0])  # Output: (2.0, 2.0, 2.0)
+    print(len(array.unique()))  # Output: 2
+
+    embeddings = PointArray(np.eye(128))
+    print(type(embeddings[5]).__name__, embeddings[5].x6)  # Output: Point128D 1.0
+    print(PointArray.from_points(embeddings).data.shape)  # Output: (128, 128)
+    print(PointArray.from_bytes(embeddings.to_bytes()).data.base is not None)  # Output: True (a view of the bytes)
+    print(Point.from_bytes(array[:1].to_bytes()))  # Output: (0.0, 0.0, 0.0)
+
+    benchmark()  # Prints the time of conversions and vectorized operations on a million points
@@ -4,52 +4,493 @@ multiple files. Leveraging both threading and multiprocessing, the download mana
 import threading
 import requests
 import ftplib
+import hashlib
+import http.server
+import io
+import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
 
-def download_content(url: str) -> bytes:
+
+class ConnectionPool:
+    """
+    Keeps connections open across downloads: one keep-alive requests.Session per HTTP host, and the idle, logged-in
+    FTP control connections of every FTP server and account.
     """
-    Downloads content from a given URL, supporting both HTTP and FTP protocols.
+    def __init__(self, max_connections_per_host=3, timeout=30):
+        """
+        Initializes an empty pool.
+
+        Parameters:
+            max_connections_per_host (int): The number of keep-alive HTTP connections kept per host.
+            timeout (float): The connect and read timeout of every connection, in seconds.
+        """
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sessions = {}  # (scheme, host, port) -> requests.Session
+        self._idle_ftp = {}  # (host, port, username, password) -> idle ftplib.FTP connections
+
+    def session(self, url: str) -> requests.Session:
+        """
+        Returns the shared session of the URL's host. Its connection pool holds max_connections_per_host
+        connections, so concurrent downloads from one host reuse them instead of opening one connection each.
+        """
+        parsed_url = urlparse(url)
+        key = (parsed_url.scheme, parsed_url.hostname, parsed_url.port)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_connections_per_host)
+                session.mount(f"{parsed_url.scheme}://", adapter)
+            return session
+
+    @contextmanager
+    def ftp(self, url: str):
+        """
+        Lends a logged-in FTP control connection to the URL's server, reusing an idle one when it still answers.
+        """
+        parsed_url = urlparse(url)
+        key = (parsed_url.hostname, parsed_url.port or ftplib.FTP_PORT, parsed_url.username, parsed_url.password)
+        ftp = None
+        while ftp is None:
+            with self._lock:
+                idle = self._idle_ftp.get(key)
+                ftp = idle.pop() if idle else None
+            if ftp is None:
+                ftp = ftplib.FTP(timeout=self.timeout)
+                ftp.connect(key[0], key[1])
+                ftp.login(parsed_url.username or "", parsed_url.password or "")
+                break
+            try:
+                ftp.voidcmd("NOOP")
+            except ftplib.all_errors:
+                ftp.close()  # The server closed the idle connection; try the next one
+                ftp = None
+        try:
+            yield ftp
+        except BaseException:
+            ftp.close()  # The connection may be in the middle of a transfer; do not reuse it
+            raise
+        with self._lock:
+            self._idle_ftp.setdefault(key, []).append(ftp)
+
+    def close(self):
+        """
+        Closes every pooled connection.
+        """
+        with self._lock:
+            sessions, self._sessions = list(self._sessions.values()), {}
+            idle, self._idle_ftp = [ftp for connections in self._idle_ftp.values() for ftp in connections], {}
+        for session in sessions:
+            session.close()
+        for ftp in idle:
+            try:
+                ftp.quit()
+            except ftplib.all_errors:
+                ftp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+@contextmanager
+def _pooled(connections):
+    """
+    Yields the given ConnectionPool, or a single-use one that is closed afterwards.
+    """
+    if connections is not None:
+        yield connections
+    else:
+        with ConnectionPool(max_connections_per_host=1) as connections:
+            yield connections
+
+
+def stream_content(url: str, file, connections: ConnectionPool, buffer_size: int = DEFAULT_BUFFER_SIZE) -> int:
+    """
+    Streams the content of a URL into a binary file object, buffer_size bytes at a time, supporting both HTTP and
+    FTP protocols. At most one buffer of the content is held in memory.
 
     Parameters:
         url (str): The URL of the file to download.
+        file: The binary file object to write to.
+        connections (ConnectionPool): The pool to take connections from.
+        buffer_size (int): The number of bytes read from the socket and written to the file at a time.
     Returns:
-        bytes: The content of the downloaded file.
+        int: The number of bytes written; 0 when the HTTP server does not answer with 200.
     """
+    written = 0
     if url.startswith("http"):
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.content
-        else:
-            return b''
+        with connections.session(url).get(url, stream=True, timeout=connections.timeout) as response:
+            if response.status_code != 200:
+                return 0
+            for chunk in response.iter_content(chunk_size=buffer_size):
+                written += file.write(chunk)
     elif url.startswith("ftp"):
         parsed_url = urlparse(url)
-        filename = os.path.basename(parsed_url.path)
-        with ftplib.FTP(parsed_url.hostname) as ftp:
-            ftp.login(parsed_url.username, parsed_url.password)
+        with connections.ftp(url) as ftp:
             ftp.cwd(os.path.dirname(parsed_url.path))
-            content = b''
-            with open(filename, "wb") as f:
-                def callback(data):
-                    f.write(data)
-                ftp.retrbinary("RETR " + filename, callback)
-        with open(filename, "rb") as f:
-            content = f.read()
-        os.remove(filename)
-        return content
+
+            def callback(data):
+                nonlocal written
+                written += file.write(data)
+            ftp.retrbinary("RETR " + os.path.basename(parsed_url.path), callback, blocksize=buffer_size)
     else:
         raise ValueError("Unsupported URL protocol")
+    return written
+
+
+def download_content(url: str, connections: ConnectionPool = None) -> bytes:
+    """
+    Downloads content from a given URL into memory, supporting both HTTP and FTP protocols. Use download_to_file()
+    for large files.
+
+    Parameters:
+        url (str): The URL of the file to download.
+        connections (ConnectionPool): The pool to take connections from. Without one, the download opens and closes
+            its own connection.
+    Returns:
+        bytes: The content of the downloaded file.
+    """
+    buffer = io.BytesIO()
+    with _pooled(connections) as connections:
+        stream_content(url, buffer, connections)
+    return buffer.getvalue()
+
+
+def download_to_file(url: str, filename: str, connections: ConnectionPool = None,
+                     buffer_size: int = DEFAULT_BUFFER_SIZE) -> int:
+    """
+    Streams the content of a URL straight into filename, so memory use does not grow with the size of the file.
+
+    The content is written to filename + ".part", which is renamed to filename once the download is complete, and
+    removed if it fails.
+
+    Parameters:
+        url (str): The URL of the file to download.
+        filename (str): The destination file.
+        connections (ConnectionPool): The pool to take connections from. Without one, the download opens and closes
+            its own connection.
+        buffer_size (int): The number of bytes read from the socket and written to the file at a time.
+    Returns:
+        int: The number of bytes written.
+    """
+    partial = filename + ".part"
+    try:
+        with _pooled(connections) as connections, open(partial, "wb", buffering=0) as f:
+            written = stream_content(url, f, connections, buffer_size)
+        os.replace(partial, filename)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return written
+
+
+class SegmentedDownload:
+    """
+    Downloads one URL into filename in resumable pieces, and checks the result against an optional checksum.
+
+    The content is written into filename + ".part", preallocated to its full size, and the progress of every piece
+    is kept in the sidecar file filename + ".part.json". A later SegmentedDownload of the same URL and file continues
+    every piece where the interrupted one stopped, as long as the server still reports the same size and version.
+
+    HTTP servers that accept byte ranges send the file in up to `segments` Range requests at once, each written at
+    its offset in the file. The requests ask for the identity encoding and the bytes are written as received, so
+    the offsets always count the bytes of the file itself. FTP servers send it in one stream that restarts at the
+    first missing byte with REST.
+
+    Files smaller than MIN_SEGMENT_SIZE, and files of servers that report no size or accept no ranges, are fetched
+    by download_to_file() in one stream, without a state file and without resume.
+    """
+    MIN_SEGMENT_SIZE = 4 * 1024 * 1024  # Smaller files are not worth more than one request
+    _IDENTITY = {"Accept-Encoding": "identity"}  # Sizes and ranges then count the bytes of the file itself
+    CHECKPOINT_SIZE = 8 * 1024 * 1024  # The sidecar file is rewritten after this many new bytes
+
+    def __init__(self, url: str, filename: str, connections: ConnectionPool = None, segments: int = 4,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE, checksum: str = None):
+        """
+        Initializes the download.
+
+        Parameters:
+            url (str): The URL of the file to download.
+            filename (str): The destination file.
+            connections (ConnectionPool): The pool to take connections from. Without one, the download opens and
+                closes its own connections.
+            segments (int): The largest number of HTTP Range requests in flight at once.
+            buffer_size (int): The number of bytes read from the socket and written to the file at a time.
+            checksum (str): The expected digest of the file as "algorithm:hexdigest", e.g. "sha256:9f86...", with
+                any algorithm of hashlib. None skips the check.
+        """
+        self.url = url
+        self.filename = filename
+        self.connections = connections
+        self.segments = segments
+        self.buffer_size = buffer_size
+        self.checksum = checksum
+        if checksum is not None:
+            algorithm, separator, expected = checksum.partition(":")
+            if not separator or not expected:
+                raise ValueError(f"Invalid checksum. Expected 'algorithm:hexdigest', but got {checksum!r}.")
+            hashlib.new(algorithm)  # Raises ValueError for an unsupported algorithm before anything is downloaded
+        self.partial = filename + ".part"
+        self.state_file = filename + ".part.json"
+        self._lock = threading.Lock()
+        self._state = None
+        self._unsaved = 0
+
+    def run(self) -> int:
+        """
+        Downloads the missing pieces of the file, verifies it and renames it to filename.
+
+        Returns:
+            int: The size of the file.
+        Raises:
+            ValueError: If the URL protocol is unsupported, the server sends other bytes than requested, or the
+                file does not match the checksum.
+        """
+        with _pooled(self.connections) as connections:
+            if self.url.startswith("http"):
+                size, version, resumable = self._probe_http(connections)
+                fetch = self._fetch_http
+            elif self.url.startswith("ftp"):
+                size, version, resumable = self._probe_ftp(connections)
+                fetch = self._fetch_ftp
+            else:
+                raise ValueError("Unsupported URL protocol")
+            if size is None or not resumable or size < self.MIN_SEGMENT_SIZE:
+                size = download_to_file(self.url, self.filename, connections, self.buffer_size)
+                self._verify(self.filename)
+                return size
+
+            self._load_state(size, version, split=fetch == self._fetch_http)
+            pending = [segment for segment in self._state["segments"] if segment[2] < segment[1]]
+            try:
+                if len(pending) == 1:
+                    fetch(connections, pending[0])
+                elif pending:
+                    with ThreadPoolExecutor(max_workers=min(self.segments, len(pending)),
+                                            thread_name_prefix="segment") as executor:
+                        futures = [executor.submit(fetch, connections, segment) for segment in pending]
+                    for future in futures:
+                        future.result()
+            finally:
+                with self._lock:
+                    self._save_state()  # Keep the progress made since the last checkpoint
+        self._verify(self.partial)
+        os.replace(self.partial, self.filename)
+        os.remove(self.state_file)
+        return size
+
+    def _probe_http(self, connections):
+        """
+        Returns the size, version and range support of the URL, as reported by a HEAD request. A response that is
+        still content-encoded does not count as resumable, since its size is not that of the file.
+        """
+        response = connections.session(self.url).head(self.url, allow_redirects=True, headers=self._IDENTITY,
+                                                      timeout=connections.timeout)
+        if response.status_code != 200 or "Content-Length" not in response.headers:
+            return None, None, False
+        version = response.headers.get("ETag") or response.headers.get("Last-Modified")
+        return (int(response.headers["Content-Length"]), version,
+                response.headers.get("Accept-Ranges", "").lower() == "bytes"
+                and response.headers.get("Content-Encoding", "identity").lower() == "identity")
+
+    def _probe_ftp(self, connections):
+        """
+        Returns the size and modification time of the FTP file. Servers without SIZE are downloaded in one go.
+        """
+        path = urlparse(self.url).path
+        with connections.ftp(self.url) as ftp:
+            try:
+                ftp.voidcmd("TYPE I")
+                size = ftp.size(path)
+            except ftplib.error_perm:
+                return None, None, False
+            try:
+                version = ftp.voidcmd("MDTM " + path).split()[-1]
+            except ftplib.error_perm:
+                version = None
+        return size, version, True
+
+    def _load_state(self, size, version, split):
+        """
+        Loads the sidecar state of an interrupted download of the same file, or plans the pieces of a new one and
+        preallocates the partial file.
+        """
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        if (state is None or not os.path.exists(self.partial)
+                or (state.get("url"), state.get("size"), state.get("version")) != (self.url, size, version)):
+            count = max(1, min(self.segments, size // self.MIN_SEGMENT_SIZE)) if split else 1
+            bounds = [size * number // count for number in range(count + 1)]
+            # Every segment is [first byte, end, next byte to download]
+            state = {"url": self.url, "size": size, "version": version,
+                     "segments": [[start, end, start] for start, end in zip(bounds, bounds[1:])]}
+            with open(self.partial, "wb") as f:
+                if size and hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(f.fileno(), 0, size)
+                else:
+                    f.truncate(size)
+            self._state = state
+            self._save_state()
+        self._state = state
+
+    def _save_state(self):
+        """
+        Atomically replaces the sidecar file with the current progress. The caller holds self._lock.
+        """
+        temporary = self.state_file + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(self._state, f)
+        os.replace(temporary, self.state_file)
+        self._unsaved = 0
+
+    def _advance(self, segment, position):
+        """
+        Records that segment is downloaded up to position, and checkpoints the state every CHECKPOINT_SIZE bytes.
+        """
+        with self._lock:
+            self._unsaved += position - segment[2]
+            segment[2] = position
+            if self._unsaved >= self.CHECKPOINT_SIZE or position == segment[1]:
+                self._save_state()
+
+    def _fetch_http(self, connections, segment):
+        """
+        Downloads the missing bytes of one segment with a Range request and writes them at their offset.
+        """
+        _, end, position = segment
+        headers = {"Range": f"bytes={position}-{end - 1}", **self._IDENTITY}
+        version = self._state["version"]
+        if version and not version.startswith("W/"):
+            headers["If-Range"] = version  # A changed file comes back whole, with 200, instead of mixed with the old
+        with connections.session(self.url).get(self.url, headers=headers, stream=True,
+                                               timeout=connections.timeout) as response:
+            if response.status_code != 206:
+                raise ValueError(f"Expected bytes {position}-{end - 1} of {self.url}, "
+                                 f"but the server answered with status {response.status_code}.")
+            content_range = response.headers.get("Content-Range", "")
+            expected = f"bytes {position}-{end - 1}/"
+            if not content_range.startswith(expected):
+                raise ValueError(f"Expected bytes {position}-{end - 1} of {self.url}, "
+                                 f"but the server sent {content_range or 'no Content-Range'}.")
+            if response.headers.get("Content-Encoding", "identity").lower() != "identity":
+                raise ValueError(f"Expected bytes {position}-{end - 1} of {self.url} unencoded, "
+                                 f"but the server sent them as {response.headers['Content-Encoding']}.")
+            with open(self.partial, "r+b", buffering=0) as f:
+                f.seek(position)
+                for chunk in response.raw.stream(self.buffer_size, decode_content=False):
+                    chunk = chunk[:end - position]
+                    position += f.write(chunk)
+                    self._advance(segment, position)
+        if position < end:
+            raise ValueError(f"The connection closed after {position} of bytes {segment[0]}-{end - 1} of {self.url}.")
+
+    def _fetch_ftp(self, connections, segment):
+        """
+        Downloads the rest of the file, asking the server to restart the transfer at the first missing byte.
+        """
+        _, end, position = segment
+        parsed_url = urlparse(self.url)
+        with connections.ftp(self.url) as ftp, open(self.partial, "r+b", buffering=0) as f:
+            ftp.cwd(os.path.dirname(parsed_url.path))
+            f.seek(position)
+
+            def callback(data):
+                nonlocal position
+                position += f.write(data)
+                self._advance(segment, position)
+            ftp.retrbinary("RETR " + os.path.basename(parsed_url.path), callback, blocksize=self.buffer_size,
+                           rest=position or None)
+        if position != end:
+            raise ValueError(f"Expected {end} bytes of {self.url}, but got {position}.")
+
+    def _verify(self, path):
+        """
+        Compares the digest of path with the expected checksum, and removes the download if they differ.
+        """
+        if self.checksum is None:
+            return
+        algorithm, _, expected = self.checksum.partition(":")
+        digest = hashlib.new(algorithm)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(self.buffer_size), b""):
+                digest.update(block)
+        if digest.hexdigest() != expected.lower():
+            for leftover in (path, self.state_file):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise ValueError(f"Checksum mismatch for {self.url}. Expected {expected}, but got {digest.hexdigest()}.")
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    SimpleHTTPRequestHandler that also answers single byte-range requests, to test segmented downloads against a
+    local http.server.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def end_headers(self):
+        self.send_header("Accept-Ranges", "bytes")
+        super().end_headers()
+
+    def do_GET(self):
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        path = self.translate_path(self.path)
+        if match is None or not os.path.isfile(path):
+            return super().do_GET()
+        size = os.path.getsize(path)
+        start = int(match[1])
+        end = min(int(match[2]) if match[2] else size - 1, size - 1)
+        if start > end:
+            self.send_error(416, "Range Not Satisfiable")
+            return
+        with open(path, "rb") as f:
+            self.send_response(206)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Last-Modified", self.date_time_string(int(os.fstat(f.fileno()).st_mtime)))
+            self.end_headers()
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining:
+                block = f.read(min(remaining, 64 * 1024))
+                self.wfile.write(block)
+                remaining -= len(block)
+
 
 class Download:
     """
     Base class representing a downloadable file.
     """
-    def __init__(self, url, filename):
+    def __init__(self, url, filename, connections=None, buffer_size=DEFAULT_BUFFER_SIZE, segments=4, checksum=None):
         """
-        Initializes a Download object with URL and destination filename.
+        Initializes a Download object with URL and destination filename, and optionally the ConnectionPool to
+        download through, the size of the buffer streamed from the socket to the file, the number of parallel HTTP
+        Range requests and the expected "algorithm:hexdigest" checksum of the file.
         """
         self.url = url
         self.filename = filename
+        self.connections = connections
+        self.buffer_size = buffer_size
+        self.segments = segments
+        self.checksum = checksum
 
     def start_download(self):
         """
@@ -61,19 +502,12 @@ class Download:
 
     def _download_file(self):
         """
-        Private method to handle the download process.
+        Private method to handle the download process. An interrupted download resumes where it stopped.
         """
-        content = download_content(self.url)
-        self.save_file(content)
+        SegmentedDownload(self.url, self.filename, self.connections, self.segments, self.buffer_size,
+                          self.checksum).run()
         self.download_complete()
 
-    def save_file(self, content: bytes):
-        """
-        Saves the downloaded content to the specified filename.
-        """
-        with open(self.filename, "wb") as f:
-            f.write(content)
-
     def download_complete(self):
         """
         Signals that the download is complete.
@@ -94,31 +528,38 @@ class DownloadManager:
     """
     Manages multiple downloads using threading.
     """
-    def __init__(self, max_threads=3):
+    def __init__(self, max_threads=3, buffer_size=DEFAULT_BUFFER_SIZE, segments=4):
         """
-        Initializes the DownloadManager with the specified maximum number of threads.
+        Initializes the DownloadManager with the specified maximum number of threads, streaming buffer size and
+        number of parallel Range requests per HTTP download. Each of the max_threads downloads may run up to
+        `segments` requests at once.
         """
         self.max_threads = max_threads
+        self.buffer_size = buffer_size
+        self.segments = segments
         self.downloads = []
+        self.connections = ConnectionPool(max_connections_per_host=max_threads * segments)
 
-    def download(self, url: str, filename: str):
+    def download(self, url: str, filename: str, checksum: str = None):
         """
-        Adds a new download to the manager.
+        Adds a new download to the manager, optionally checked against an "algorithm:hexdigest" checksum.
         """
-        download = ThreadingDownloader(url, filename)
+        download = ThreadingDownloader(url, filename, self.connections, self.buffer_size, self.segments, checksum)
         self.downloads.append(download)
 
     def start(self):
         """
-        Starts all downloads simultaneously.
+        Runs all downloads on a pool of max_threads worker threads, which share the keep-alive HTTP sessions and FTP
+        connections of the manager, and closes those connections once every download has finished.
         """
-        threads = []
-        for download in self.downloads:
-            thread = download.start_download()
-            threads.append(thread)
-
-        for thread in threads:
-            thread.join()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix="download") as executor:
+                futures = {executor.submit(download._download_file): download for download in self.downloads}
+            for future, download in futures.items():
+                if future.exception() is not None:
+                    print(f"Download from {download.url} failed: {future.exception()}")
+        finally:
+            self.connections.close()
 
     def wait(self) -> None:
         """
@@ -128,13 +569,27 @@ class DownloadManager:
             download_thread.join()
 
 if __name__ == "__main__":
-    download_manager = DownloadManager(max_threads=3)
-
-    download_manager.download("http://example.com/file1.txt", "file1.txt")
-    download_manager.download("ftp://example.com/file2.txt", "file2.txt")
-    download_manager.download("http://example.com/file3.txt", "file3.txt")
+    import functools
+    import shutil
+    import tempfile
 
-    download_manager.start()
+    # Serve a 64 MiB file from a local http.server that answers Range requests
+    directory = tempfile.mkdtemp()
+    try:
+        content = os.urandom(64 * 1024 * 1024)
+        with open(os.path.join(directory, "file1.bin"), "wb") as f:
+            f.write(content)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(RangeRequestHandler,
+                                                                                     directory=directory))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/file1.bin"
+        filename = os.path.join(directory, "copy1.bin")
 
-    print("All downloads completed!")
+        download_manager = DownloadManager(max_threads=3)
+        download_manager.download(url, filename, checksum="sha256:" + hashlib.sha256(content).hexdigest())
+        download_manager.start()  # Fetches the file in 4 Range requests of 16 MiB, then checks the checksum
 
+        print("All downloads completed!")
+        server.shutdown()
+    finally:
+        shutil.rmtree(directory)